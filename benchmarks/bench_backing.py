@@ -0,0 +1,49 @@
+"""Benchmark de render_backing_track (factor de tiempo real)
+
+Uso: python benchmarks/bench_backing.py [--minutes 4] [--instrument piano]
+
+Renderiza una canción sintética a un WAV temporal en un solo núcleo y
+muestra cuántas veces más rápido que tiempo real se generó, junto con la
+memoria pico (que no debe crecer con la duración de la canción).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_timeline
+from chordchart.backing import render_backing_track
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=4.0)
+    parser.add_argument('--instrument', default='piano', choices=['piano', 'sine', 'organ'])
+    parser.add_argument('--mode', default='overlap', choices=['overlap', 'cut'])
+    args = parser.parse_args()
+
+    # Acordes de ~2 segundos, como en una canción pop
+    timeline = synthetic_timeline(int(args.minutes * 30), mean_duration=2.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'backing.wav')
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        frames = render_backing_track(timeline, path, args.instrument, mode=args.mode)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    audio_seconds = frames / 44100
+    print(f"audio:        {audio_seconds:.1f} s")
+    print(f"render:       {elapsed:.2f} s")
+    print(f"tiempo real:  {audio_seconds / elapsed:.0f}x")
+    print(f"memoria pico: {peak / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
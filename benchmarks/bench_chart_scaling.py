@@ -0,0 +1,36 @@
+"""Benchmark de escalado de generate_chord_chart (1k a 1M acordes)
+
+Uso: python benchmarks/bench_chart_scaling.py [--max 1000000]
+
+El tiempo por acorde debe mantenerse aproximadamente constante al crecer
+la canción; si crece con el tamaño, el render volvió a ser cuadrático.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_timeline
+from chordchart.chart import generate_chord_chart
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max', type=int, default=1_000_000, help="Número máximo de acordes")
+    args = parser.parse_args()
+
+    print(f"{'acordes':>10} {'segundos':>10} {'us/acorde':>10}")
+    n = 1000
+    while n <= args.max:
+        timeline = synthetic_timeline(n)
+        t0 = time.perf_counter()
+        generate_chord_chart(timeline, 120, 4, 4, 8)
+        elapsed = time.perf_counter() - t0
+        print(f"{n:>10} {elapsed:>10.3f} {elapsed / n * 1e6:>10.2f}")
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark de lectura de CSV de acordes: csv.DictReader vs chordchart.loader
+
+Uso: python benchmarks/bench_csv_load.py [--rows 1000000] [--chunksize 500000]
+
+Escribe un CSV sintético, lo lee con el lector fila a fila original (con
+las mismas validaciones "Fila N") y con read_chord_csv, comprueba que el
+resultado es idéntico y muestra filas por segundo y memoria pico. También
+mide la recarga desde el binario ``.ctl`` (chordchart.timelinefile).
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_timeline
+from chordchart import ChordTimeline
+from chordchart.loader import read_chord_csv
+from chordchart.timelinefile import load_timeline, save_timeline
+
+
+def read_with_dictreader(path):
+    """Lector fila a fila previo a chordchart.loader (referencia)"""
+    names, starts, ends = [], [], []
+    invalid_rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            try:
+                chord = row['chord'].strip()
+                start = float(row['start'])
+                end = float(row['end'])
+                if not chord:
+                    invalid_rows.append(f"Fila {i+2}: Acorde vacío")
+                    continue
+                if start < 0 or end < 0:
+                    invalid_rows.append(f"Fila {i+2}: Tiempos negativos no permitidos")
+                    continue
+                if start >= end:
+                    invalid_rows.append(f"Fila {i+2}: Tiempo de inicio debe ser menor que tiempo de fin")
+                    continue
+                names.append(chord)
+                starts.append(start)
+                ends.append(end)
+            except ValueError as e:
+                invalid_rows.append(f"Fila {i+2}: Error en formato numérico - {e}")
+    return ChordTimeline.from_columns(names, starts, ends), invalid_rows
+
+
+def write_csv(path, n_rows):
+    timeline = synthetic_timeline(n_rows)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('chord,start,end\n')
+        buffer = io.StringIO()
+        for record in timeline.to_records():
+            buffer.write(f"{record['chord']},{record['start']!r},{record['end']!r}\n")
+        # Unas pocas filas inválidas para ejercitar la ruta de errores
+        buffer.write(',1.0,2.0\nC:maj,abc,2.0\nG:maj,3.0,1.0\n')
+        f.write(buffer.getvalue())
+
+
+def measure(func, *args):
+    """(resultado, segundos, bytes pico); la memoria se mide en una segunda
+    pasada porque tracemalloc penaliza mucho más al lector fila a fila"""
+    t0 = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'chords.csv')
+        write_csv(path, args.rows)
+        print(f"archivo: {os.path.getsize(path) / 1e6:.1f} MB, {args.rows + 3} filas")
+
+        (ref, ref_errors), ref_time, ref_peak = measure(read_with_dictreader, path)
+        (fast, fast_errors), fast_time, fast_peak = measure(read_chord_csv, path, args.chunksize)
+
+        binary_path = path + '.ctl'
+        save_timeline(fast, binary_path, os.stat(path))
+        mapped, mmap_time, mmap_peak = measure(load_timeline, binary_path)
+        mapped_digest = mapped.digest()
+        del mapped  # Liberar el mapeo antes de borrar el directorio
+
+    if ref.digest() != fast.digest() or ref_errors != fast_errors or mapped_digest != ref.digest():
+        print("ERROR: los dos lectores no producen el mismo resultado")
+        sys.exit(1)
+
+    print(f"{'lector':>12} {'segundos':>10} {'filas/s':>12} {'pico MB':>10}")
+    results = (
+        ('DictReader', ref_time, ref_peak),
+        ('loader', fast_time, fast_peak),
+        ('binario mmap', mmap_time, mmap_peak),
+    )
+    for name, elapsed, peak in results:
+        print(f"{name:>12} {elapsed:>10.2f} {args.rows / elapsed:>12,.0f} {peak / 1e6:>10.1f}")
+    print(f"aceleración: {ref_time / fast_time:.1f}x (loader), {ref_time / mmap_time:.0f}x (binario)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark de tiempo de arranque (importación en frío) de la app, la librería y la CLI
+
+Uso: python benchmarks/bench_import.py [--runs 5]
+
+Cada medida se hace en un intérprete nuevo y se informa el mínimo de
+``--runs`` ejecuciones, junto con las dependencias pesadas que quedaron
+cargadas. ``import streamlit_app`` es lo que antes había que importar
+para renderizar un chart fuera de la interfaz.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('streamlit', 'pandas', 'fpdf', 'numpy')
+
+TARGETS = [
+    ('app (streamlit_app)', 'import streamlit_app'),
+    ('paquete', 'import chordchart'),
+    ('chart de texto', 'from chordchart.chart import generate_chord_chart'),
+    ('CLI', 'import chordchart.cli'),
+]
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - t0
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure_import(statement, runs):
+    """(mínimo de segundos, módulos pesados cargados) de ``statement`` en frío"""
+    best, loaded = float('inf'), ''
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        best = min(best, float(output[0]))
+        loaded = output[1] if len(output) > 1 else '-'
+    return best, loaded
+
+
+def measure_cli_help(runs):
+    """Segundos de proceso completo de ``python -m chordchart --help``"""
+    best = float('inf')
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'chordchart', '--help'], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'importación':<22} {'ms':>8} {'vs app':>8}  dependencias cargadas")
+    baseline = None
+    for name, statement in TARGETS:
+        elapsed, loaded = measure_import(statement, args.runs)
+        baseline = baseline or elapsed
+        print(f"{name:<22} {elapsed * 1000:>8.1f} {baseline / elapsed:>7.0f}x  {loaded}")
+    print(f"\n'python -m chordchart --help' (proceso completo): {measure_cli_help(args.runs) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
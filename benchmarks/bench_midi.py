@@ -0,0 +1,77 @@
+"""Benchmark de lectura de MIDI y detección de acordes (escalado lineal)
+
+Uso: python benchmarks/bench_midi.py [--max-notes 1000000] [--tracks 16]
+
+Genera archivos MIDI sintéticos densos con varias pistas y mide la
+lectura de notas y la detección de acordes. El tiempo por nota debe
+mantenerse aproximadamente constante al crecer el archivo.
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chordchart.cache import midi_cache
+from chordchart.midi import midi_chord_timeline, read_midi_notes
+
+
+def _varlen(value):
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def write_dense_midi(path, n_notes, n_tracks, seed=0):
+    """Escribir un MIDI de formato 1 con ``n_notes`` notas repartidas en pistas"""
+    rng = np.random.default_rng(seed)
+    per_track = n_notes // n_tracks
+    tracks = [b'\x00\xff\x51\x03\x07\xa1\x20\x00\xff\x2f\x00']  # 120 BPM
+    for track in range(n_tracks):
+        pitches = rng.integers(36, 84, per_track).tolist()
+        events = bytearray()
+        for pitch in pitches:
+            # Notas de una corchea (240 ticks) una tras otra
+            events += _varlen(0) + bytes((0x90 | track % 16, pitch, 80))
+            events += _varlen(240) + bytes((0x80 | track % 16, pitch, 0))
+        events += b'\x00\xff\x2f\x00'
+        tracks.append(bytes(events))
+    with open(path, 'wb') as f:
+        f.write(struct.pack('>4sIHHH', b'MThd', 6, 1, len(tracks), 480))
+        for events in tracks:
+            f.write(struct.pack('>4sI', b'MTrk', len(events)) + events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-notes', type=int, default=1_000_000)
+    parser.add_argument('--tracks', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'notas':>10} {'lectura s':>10} {'acordes s':>10} {'us/nota':>10}")
+    n = 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        while n <= args.max_notes:
+            path = os.path.join(tmp, f'dense_{n}.mid')
+            write_dense_midi(path, n, args.tracks)
+            midi_cache.clear()
+
+            t0 = time.perf_counter()
+            notes = read_midi_notes(path)
+            t1 = time.perf_counter()
+            midi_chord_timeline(notes)
+            t2 = time.perf_counter()
+            print(f"{len(notes.pitch):>10} {t1 - t0:>10.3f} {t2 - t1:>10.3f} {(t2 - t0) / n * 1e6:>10.2f}")
+            n *= 10
+
+
+if __name__ == '__main__':
+    main()
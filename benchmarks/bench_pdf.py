@@ -0,0 +1,45 @@
+"""Benchmark de exportación a PDF: chart de texto (generate_pdf) vs vectorial (generate_chart_pdf)
+
+Uso: python benchmarks/bench_pdf.py [--chords 20000]
+
+Muestra segundos, páginas y tamaño de cada PDF para una canción sintética.
+El PDF de texto trunca las líneas largas; el vectorial ajusta cada sistema
+al ancho de la página.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_timeline
+from chordchart.chart import iter_chord_chart
+from chordchart.pdf import generate_chart_pdf, generate_pdf, pdf_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chords', type=int, default=20_000)
+    parser.add_argument('--measures-per-line', type=int, default=4)
+    args = parser.parse_args()
+
+    timeline = synthetic_timeline(args.chords)
+    layout = (120, 4, args.measures_per_line)
+    pdf_bytes(generate_chart_pdf(timeline[:10], *layout))  # Carga de fpdf y fuentes
+
+    renderers = (
+        ('texto', lambda: generate_pdf(iter_chord_chart(timeline, *layout, 8), "Benchmark")),
+        ('vectorial', lambda: generate_chart_pdf(timeline, *layout, "Benchmark")),
+    )
+    print(f"{'PDF':>10} {'segundos':>10} {'páginas':>8} {'KB':>8}")
+    for name, render in renderers:
+        t0 = time.perf_counter()
+        document = render()
+        data = pdf_bytes(document)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:>10} {elapsed:>10.2f} {document.pages_count:>8} {len(data) / 1024:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Regresión de memoria pico de render_scale_audio
+
+Uso: python benchmarks/bench_scale_memory.py [--repetitions 10] [--duration-ms 2000]
+
+Mide con tracemalloc la memoria pico al generar una escala larga y termina
+con código 1 si supera el presupuesto: el resultado int16 (2 bytes por
+muestra), unos pocos buffers del tamaño de una nota (temporales de
+generate_tone y las notas ya convertidas a int16) y lo que quede retenido
+en las cachés de notas y envolventes. Antes se construía además un buffer
+float64 de la escala completa (8 bytes por muestra), y la versión con
+listas de floats de Python usaba varias veces más.
+
+Es la versión manual (con parámetros) de tests/test_scale_memory.py, que
+comprueba el mismo presupuesto con pytest. bench_suite.py compare también
+detecta regresiones de memoria pico de la etapa de escalas.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chordchart import envelope_cache, note_cache
+from chordchart.audio import render_scale_audio
+
+# Buffers de una nota que se permiten además del resultado
+NOTE_BUFFER_ALLOWANCE = 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--duration-ms', type=int, default=2000)
+    parser.add_argument('--instrument', default='piano', choices=['piano', 'sine', 'organ'])
+    args = parser.parse_args()
+
+    # Calentar cachés de módulo (wavetables) fuera de la medición
+    render_scale_audio('C', 200, 1, True, False, args.instrument)
+
+    tracemalloc.start()
+    audio, sample_rate = render_scale_audio('C', args.duration_ms, args.repetitions, True, True, args.instrument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    note_samples = int(sample_rate * args.duration_ms / 1000.0)
+    cached = note_cache.current_bytes + envelope_cache.current_bytes
+    budget = len(audio) * 2 + NOTE_BUFFER_ALLOWANCE * note_samples * 8 + cached
+
+    print(f"muestras:    {len(audio)}")
+    print(f"pico:        {peak / 1e6:.1f} MB")
+    print(f"en cachés:   {cached / 1e6:.1f} MB")
+    print(f"presupuesto: {budget / 1e6:.1f} MB")
+    if peak > budget:
+        print("FALLO: la memoria pico supera el presupuesto")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
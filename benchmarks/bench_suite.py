@@ -0,0 +1,344 @@
+"""Suite de benchmarks reproducible: carga, tempo, chart, PDF y audio con baseline
+
+Uso:
+    python benchmarks/bench_suite.py run [-o resultados.json] [--repeat 3] [--full]
+    python benchmarks/bench_suite.py save-baseline [--baseline benchmarks/baseline.json]
+    python benchmarks/bench_suite.py compare [--results resultados.json] [--threshold 0.25]
+
+Las canciones son sintéticas con semilla fija (de una canción pop de 3
+minutos a un set de 3 horas) más el CSV incluido de "Me has dado libertad".
+Para cada canción y etapa se mide el mejor tiempo de ``--repeat`` muestras
+(cada llamada con las cachés vacías) y, en una ejecución aparte con
+tracemalloc (a través de chordchart.profiling), la memoria pico que asigna
+la etapa. El throughput es acordes por segundo en las etapas de canción y
+segundos de audio por segundo en las de audio.
+
+``compare`` termina con código 1 si alguna etapa es más lenta o usa más
+memoria que la baseline en más de ``--threshold`` (0.25 = 25%); las
+diferencias por debajo de MIN_DELTA_SECONDS y MIN_DELTA_BYTES se consideran
+ruido. También falla si no se ha medido alguna etapa de la baseline (salvo
+las de casos excluidos con ``--cases``). La baseline depende de la máquina:
+regenerarla con ``save-baseline`` al cambiar de equipo.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import synthetic_song_seconds, timeline_csv
+from chordchart import chart_cache, envelope_cache, note_cache, pdf_cache
+from chordchart.audio import generate_tone, get_scale_notes, render_scale_audio
+from chordchart.backing import render_backing_track
+from chordchart.chart import generate_chord_chart
+from chordchart.loader import read_chord_csv
+from chordchart.pdf import generate_chart_pdf, pdf_bytes
+from chordchart.profiling import instrumentation
+from chordchart.tempo import estimate_tempo, tempo_cache
+from chordchart.transpose import transpose_cache
+
+# Versión del formato de resultados y baseline
+RESULTS_VERSION = 1
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+BUNDLED_CSV = os.path.join(ROOT, 'Me has dado libertad.mp3-chord_csv.csv')
+
+# Canciones sintéticas (nombre, segundos), todas a 120 BPM en 4/4
+SYNTHETIC_SONGS = [
+    ('pop-3min', 3 * 60),
+    ('ensayo-20min', 20 * 60),
+    ('concierto-1h', 60 * 60),
+    ('set-3h', 3 * 60 * 60),
+]
+
+# Layout del chart y del PDF: bpm, beats por compás, compases por línea
+LAYOUT = (120, 4, 4)
+CHARS_PER_BEAT = 8
+
+# La pista de acompañamiento de las canciones más largas tarda minutos; se
+# mide solo hasta esta duración salvo con --full
+BACKING_MAX_SECONDS = 30 * 60
+
+# Notas sintetizadas en la etapa de tonos (frecuencias distintas, sin caché)
+TONE_COUNT = 48
+TONE_DURATION_MS = 700
+
+# Escala de la etapa de escalas (como generate_scale_audio en la app)
+SCALE_ARGS = ('C', 700, 10, True, True, 'piano')
+
+# Duración mínima de cada muestra de tiempo
+MIN_SAMPLE_SECONDS = 0.2
+
+# Diferencias menores que estas no cuentan como regresión (ruido de medida)
+MIN_DELTA_SECONDS = 0.002
+MIN_DELTA_BYTES = 256 * 1024
+
+CACHES = (chart_cache, pdf_cache, note_cache, envelope_cache, tempo_cache, transpose_cache)
+
+
+def clear_caches():
+    """Vaciar las cachés del paquete para medir siempre en frío"""
+    for cache in CACHES:
+        cache.clear()
+
+
+def sample(func, number):
+    """Segundos por llamada de ``number`` llamadas seguidas, cada una con las cachés vacías"""
+    t0 = time.perf_counter()
+    for _ in range(number):
+        clear_caches()
+        func()
+    return (time.perf_counter() - t0) / number
+
+
+def measure(func, repeat):
+    """(mejor tiempo en segundos, pico de memoria en bytes) de ``func``
+
+    Como timeit, las etapas cortas se repiten hasta que cada muestra dura al
+    menos MIN_SAMPLE_SECONDS. La memoria se mide en una ejecución aparte
+    porque tracemalloc ralentiza las asignaciones.
+    """
+    number = 1
+    times = [sample(func, number)]
+    while times[0] * number < MIN_SAMPLE_SECONDS:
+        number = max(int(np.ceil(MIN_SAMPLE_SECONDS / max(times[0], 1e-6))), number * 2)
+        times = [sample(func, number)]
+    times.extend(sample(func, number) for _ in range(repeat - 1))
+
+    clear_caches()
+    previous = (instrumentation.enabled, instrumentation.trace_memory, instrumentation.profile)
+    instrumentation.configure(enabled=True, trace_memory=True)
+    try:
+        with instrumentation.stage('bench'):
+            func()
+        peak = instrumentation.to_dict(clear=True)['stages']['bench']['peak_bytes']
+    finally:
+        instrumentation.configure(*previous)
+    return min(times), peak
+
+
+def case_names():
+    """Nombres de los casos de la suite, en orden ('audio' al final)"""
+    names = [name for name, _ in SYNTHETIC_SONGS] + ['audio']
+    if os.path.exists(BUNDLED_CSV):
+        names.insert(0, 'me-has-dado-libertad')
+    return names
+
+
+def check_cases(cases):
+    """Lanzar ValueError si ``cases`` tiene nombres que no están en la suite"""
+    unknown = sorted(set(cases or ()) - set(case_names()))
+    if unknown:
+        raise ValueError(f"casos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(case_names())})")
+
+
+def song_cases():
+    """(nombre, bytes del CSV) de cada canción de la suite"""
+    cases = [(name, timeline_csv(synthetic_song_seconds(seconds))) for name, seconds in SYNTHETIC_SONGS]
+    if os.path.exists(BUNDLED_CSV):
+        with open(BUNDLED_CSV, 'rb') as f:
+            cases.insert(0, ('me-has-dado-libertad', f.read()))
+    return cases
+
+
+def song_stages(raw, backing_path, full=False):
+    """Etapas de una canción: (nombre, función, acordes o segundos de audio, unidad)"""
+    timeline, _ = read_chord_csv(io.BytesIO(raw))
+    duration = float(timeline.end.max())
+    estimate = estimate_tempo(timeline)
+    chart_args = (timeline, *LAYOUT)
+    stages = [
+        ('load', lambda: read_chord_csv(io.BytesIO(raw)), len(timeline), 'acordes/s'),
+        ('tempo', lambda: estimate_tempo(timeline), len(timeline), 'acordes/s'),
+        ('chart', lambda: generate_chord_chart(*chart_args, CHARS_PER_BEAT, estimate.offset), len(timeline),
+         'acordes/s'),
+        ('pdf', lambda: pdf_bytes(generate_chart_pdf(*chart_args, "Benchmark", estimate.offset)), len(timeline),
+         'acordes/s'),
+    ]
+    if full or duration <= BACKING_MAX_SECONDS:
+        stages.append(('backing', lambda: render_backing_track(timeline, backing_path), duration, 'x tiempo real'))
+    return stages
+
+
+def audio_stages():
+    """Etapas de audio independientes de la canción"""
+    # Frecuencias distintas para que ninguna nota salga de note_cache
+    frequencies = 220.0 * 2 ** (np.arange(TONE_COUNT) / 12.0)
+    scale_notes = len(get_scale_notes(SCALE_ARGS[0]))
+    scale_seconds = scale_notes * 2 * SCALE_ARGS[2] * SCALE_ARGS[1] / 1000.0
+
+    def tones():
+        for frequency in frequencies:
+            generate_tone(float(frequency), TONE_DURATION_MS)
+
+    return [
+        ('tone', tones, TONE_COUNT * TONE_DURATION_MS / 1000.0, 'x tiempo real'),
+        ('scale', lambda: render_scale_audio(*SCALE_ARGS), scale_seconds, 'x tiempo real'),
+    ]
+
+
+def run_suite(repeat=3, full=False, cases=None, report=None):
+    """Ejecutar la suite y devolver el diccionario de resultados
+
+    ``cases`` limita las canciones (por nombre; 'audio' son las etapas de
+    audio; ValueError si alguno no existe). ``report(key, result)`` se llama
+    al terminar cada etapa.
+    """
+    check_cases(cases)
+    backing_path = os.path.join(tempfile.gettempdir(), f"chordchart_bench_{os.getpid()}.wav")
+    suite = [(name, lambda raw=raw: song_stages(raw, backing_path, full)) for name, raw in song_cases()]
+    suite.append(('audio', audio_stages))
+    if cases:
+        suite = [(name, stages) for name, stages in suite if name in cases]
+
+    # Calentamiento (importaciones, fuentes de fpdf, wavetables) con la canción más corta
+    for _, func, _, _ in song_stages(timeline_csv(synthetic_song_seconds(30)), backing_path) + audio_stages():
+        func()
+
+    results = {}
+    try:
+        for case, stages in suite:
+            for stage, func, amount, unit in stages():
+                seconds, peak = measure(func, repeat)
+                key = f"{case}/{stage}"
+                results[key] = {
+                    'seconds': seconds,
+                    'peak_bytes': peak,
+                    'amount': amount,
+                    'throughput': amount / seconds if seconds > 0 else float('inf'),
+                    'unit': unit,
+                }
+                if report is not None:
+                    report(key, results[key])
+    finally:
+        if os.path.exists(backing_path):
+            os.remove(backing_path)
+
+    return {
+        'version': RESULTS_VERSION,
+        'time': time.time(),
+        'repeat': repeat,
+        'cases': sorted(cases) if cases else None,
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+        },
+        'results': results,
+    }
+
+
+def format_result(key, result):
+    return (f"{key:<34} {result['seconds']:>9.4f} {result['throughput']:>12.1f} {result['unit']:<14} "
+            f"{result['peak_bytes'] / 1e6:>9.2f}")
+
+
+def compare(results, baseline, threshold=0.25, memory_threshold=None):
+    """Comparar con la baseline: lista de (clave, texto, es_fallo)
+
+    Las etapas de la baseline que no se han medido cuentan como fallo, salvo
+    las de casos excluidos con ``--cases``.
+    """
+    if memory_threshold is None:
+        memory_threshold = threshold
+    cases = results.get('cases')
+    rows = []
+    for key, base in baseline['results'].items():
+        current = results['results'].get(key)
+        if current is None:
+            if cases and key.split('/')[0] not in cases:
+                continue
+            rows.append((key, "NO MEDIDO", True))
+            continue
+        time_ratio = current['seconds'] / base['seconds'] if base['seconds'] > 0 else 1.0
+        memory_ratio = current['peak_bytes'] / base['peak_bytes'] if base['peak_bytes'] > 0 else 1.0
+        slower = (time_ratio > 1 + threshold
+                  and current['seconds'] - base['seconds'] > MIN_DELTA_SECONDS)
+        bigger = (memory_ratio > 1 + memory_threshold
+                  and current['peak_bytes'] - base['peak_bytes'] > MIN_DELTA_BYTES)
+        flags = ' '.join(flag for flag, failed in (('TIEMPO', slower), ('MEMORIA', bigger)) if failed)
+        rows.append((key, f"tiempo x{time_ratio:.2f}  memoria x{memory_ratio:.2f}  {flags}", slower or bigger))
+    for key in results['results'].keys() - baseline['results'].keys():
+        rows.append((key, "sin baseline", False))
+    return rows
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="Ejecutar la suite y mostrar los resultados")
+    run_parser.add_argument('-o', '--output', help="Guardar los resultados en este JSON")
+    baseline_parser = commands.add_parser('save-baseline', help="Ejecutar la suite y guardarla como baseline")
+    compare_parser = commands.add_parser('compare', help="Comparar con la baseline (código 1 si hay regresión)")
+    compare_parser.add_argument('--results', help="JSON de 'run -o' (por defecto se ejecuta la suite)")
+    compare_parser.add_argument('--threshold', type=float, default=0.25,
+                                help="Regresión de tiempo tolerada (0.25 = 25%%)")
+    compare_parser.add_argument('--memory-threshold', type=float, default=None,
+                                help="Regresión de memoria tolerada (por defecto --threshold)")
+    for command in (run_parser, baseline_parser, compare_parser):
+        command.add_argument('--repeat', type=int, default=3, help="Ejecuciones por etapa (se toma la mejor)")
+        command.add_argument('--full', action='store_true', help="Medir también la pista de las canciones largas")
+        command.add_argument('--cases', nargs='+', help="Limitar a estas canciones ('audio': etapas de audio)")
+    for command in (baseline_parser, compare_parser):
+        command.add_argument('--baseline', default=DEFAULT_BASELINE)
+    args = parser.parse_args()
+    try:
+        check_cases(args.cases)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.command == 'compare' and args.results:
+        results = load_json(args.results)
+    else:
+        print(f"{'etapa':<34} {'segundos':>9} {'throughput':>12} {'':<14} {'pico MB':>9}")
+        results = run_suite(
+            args.repeat, args.full, args.cases, report=lambda key, result: print(format_result(key, result), flush=True)
+        )
+
+    if args.command == 'run':
+        if args.output:
+            save_json(args.output, results)
+    elif args.command == 'save-baseline':
+        save_json(args.baseline, results)
+        print(f"\nBaseline guardada en {args.baseline}")
+    else:
+        baseline = load_json(args.baseline)
+        rows = compare(results, baseline, args.threshold, args.memory_threshold)
+        print(f"\nComparación con {args.baseline} (umbral {args.threshold:.0%})")
+        for key, text, _ in sorted(rows):
+            print(f"{key:<34} {text}")
+        missing = [key for key, text, _ in rows if text == "NO MEDIDO"]
+        regressions = [key for key, text, failed in rows if failed and text != "NO MEDIDO"]
+        if missing:
+            print(f"\nFALLO: {len(missing)} etapas de la baseline sin medir "
+                  "(usar las mismas opciones, p. ej. --full, o regenerar la baseline)")
+        if regressions:
+            print(f"\nFALLO: {len(regressions)} etapas con regresión")
+        if missing or regressions:
+            sys.exit(1)
+        print("\nSin regresiones")
+
+
+if __name__ == '__main__':
+    main()
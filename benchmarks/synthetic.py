@@ -0,0 +1,58 @@
+"""Canciones sintéticas para los benchmarks"""
+import numpy as np
+
+from chordchart import ChordTimeline
+
+CHORD_VOCABULARY = [
+    'C:maj', 'D:min', 'E:min', 'F:maj', 'G:maj', 'A:min', 'B:min',
+    'D:maj', 'E:maj', 'A:maj', 'G:min', 'C:min', 'F:min', 'Bb:maj',
+]
+
+
+def synthetic_timeline(n_events, mean_duration=1.0, seed=0):
+    """Generar ``n_events`` acordes consecutivos con duraciones aleatorias"""
+    rng = np.random.default_rng(seed)
+    durations = rng.uniform(0.5, 1.5, n_events) * mean_duration
+    ends = np.cumsum(durations) + 0.5
+    starts = ends - durations
+    codes = rng.integers(0, len(CHORD_VOCABULARY), n_events)
+    return ChordTimeline(CHORD_VOCABULARY, codes, starts, ends)
+
+
+def synthetic_song(n_events, bpm=120.0, offset=0.5, beats_per_measure=4, jitter=0.015, seed=0):
+    """Acordes sobre una rejilla de beats: entran en el compás o a mitad de compás
+
+    ``offset`` es el segundo del primer downbeat; ``jitter`` (segundos) es el
+    ruido de los inicios, como el de un detector de acordes.
+    """
+    rng = np.random.default_rng(seed)
+    half = beats_per_measure // 2
+    lengths = rng.choice([beats_per_measure, beats_per_measure, half, 2 * beats_per_measure], n_events)
+    # Los medios compases van de dos en dos para no perder el compás
+    lengths = np.repeat(lengths, np.where(lengths == half, 2, 1))[:n_events]
+    beats = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    period = 60.0 / bpm
+    starts = np.maximum(offset + beats * period + rng.normal(0.0, jitter, n_events), 0.0)
+    ends = np.append(starts[1:], starts[-1] + lengths[-1] * period)
+    codes = rng.integers(0, len(CHORD_VOCABULARY), n_events)
+    return ChordTimeline(CHORD_VOCABULARY, codes, starts, ends)
+
+
+def synthetic_song_seconds(duration, bpm=120.0, seed=0, **kwargs):
+    """synthetic_song recortada a los acordes que empiezan antes de ``duration`` segundos"""
+    beats_per_measure = kwargs.get('beats_per_measure', 4)
+    # Cota superior: todos los acordes de medio compás
+    n_events = int(np.ceil(duration * bpm / 60.0 / (beats_per_measure // 2))) + 1
+    timeline = synthetic_song(n_events, bpm, seed=seed, **kwargs)
+    n = int(np.searchsorted(timeline.start, duration))
+    return ChordTimeline(timeline.labels, timeline.codes[:n], timeline.start[:n], timeline.end[:n])
+
+
+def timeline_csv(timeline):
+    """Codificar una timeline como CSV ``chord,start,end`` (bytes UTF-8)"""
+    lines = ['chord,start,end']
+    lines.extend(
+        f"{timeline.labels[code]},{start!r},{end!r}"
+        for code, start, end in zip(timeline.codes.tolist(), timeline.start.tolist(), timeline.end.tolist())
+    )
+    return ('\n'.join(lines) + '\n').encode('utf-8')
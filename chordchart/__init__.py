@@ -0,0 +1,37 @@
+"""Núcleo del generador de charts de acordes (sin dependencias de interfaz).
+
+Los nombres de este módulo se importan bajo demanda: ``import chordchart``
+no carga NumPy, y pandas y fpdf solo se cargan al leer CSV o exportar PDF.
+"""
+import importlib
+
+# Nombre exportado -> submódulo que lo define
+_EXPORTS = {
+    'ChordChartError': 'errors',
+    'ChordDataError': 'errors',
+    'ChordTimeline': 'timeline',
+    'LRUCache': 'cache',
+    'chart_cache': 'cache',
+    'configure_audio_cache': 'cache',
+    'envelope_cache': 'cache',
+    'instrumentation': 'profiling',
+    'midi_cache': 'cache',
+    'note_cache': 'cache',
+    'pdf_cache': 'cache',
+    'song_cache': 'cache',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
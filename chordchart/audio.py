@@ -0,0 +1,289 @@
+import io
+import wave
+
+import numpy as np
+
+from .cache import envelope_cache, note_cache
+from .chords import CHORD_TONES, LETTER_PITCH_CLASSES, MAJOR_SCALE, SCALE_INTERVALS, parse_chord, parse_note_name
+from .profiling import timed
+from .synth import render_wavetable
+from .wavfile import create_wav_memmap
+
+
+def note_to_frequency(note_name):
+    """Convertir nombre de nota a frecuencia en Hz"""
+    # Separar nota base y octava (por defecto la 4)
+    pitch_class, octave = parse_note_name(note_name)
+    if pitch_class is None:
+        return 440.0  # Default to A4
+    octave = int(octave) if octave else 4
+    
+    # La octava va con la letra: las alteraciones que cruzan C/B cambian de
+    # octava (Cb4 es B3, B#4 es C5), así que se cuenta desde la letra
+    letter = LETTER_PITCH_CLASSES[note_name[0]]
+    pitch = letter + (pitch_class - letter + 6) % 12 - 6
+    
+    # Calcular semitonos desde A4
+    semitones = pitch - 9 + (octave - 4) * 12
+    
+    # Calcular frecuencia usando la fórmula: f = 440 * 2^(n/12)
+    frequency = 440.0 * (2 ** (semitones / 12.0))
+    return frequency
+
+
+def midi_to_frequency(midi_note):
+    """Frecuencia en Hz de un número MIDI (A4 = 69 = 440 Hz)"""
+    return 440.0 * (2 ** ((midi_note - 69) / 12.0))
+
+
+def get_scale_notes(chord_name):
+    """Obtener las notas de la escala para un acorde dado"""
+    symbol = parse_chord(chord_name)
+    
+    # Raíz a número MIDI (C4 = 60); sin raíz reconocible se usa C
+    root_midi = 60 + (symbol.root if symbol.root is not None else 0)
+    intervals = SCALE_INTERVALS.get(symbol.quality, MAJOR_SCALE)
+    
+    return [midi_to_frequency(root_midi + interval) for interval in intervals]
+
+
+def get_chord_notes(chord_name):
+    """Frecuencias de las notas del acorde: la raíz una octava abajo y la tríada o cuatríada"""
+    symbol = parse_chord(chord_name)
+    if symbol.root is None:
+        return []
+    
+    root_midi = 60 + symbol.root
+    bass_midi = root_midi - 12 if symbol.bass is None else 48 + symbol.bass
+    midi_notes = [bass_midi] + [root_midi + interval for interval in CHORD_TONES[symbol.quality]]
+    return [midi_to_frequency(midi_note) for midi_note in midi_notes]
+
+
+def generate_piano_harmonics(frequency, t, amplitude=0.3):
+    """Generar armónicos para simular sonido de piano"""
+    # Armónicos más realistas del piano con amplitudes más suaves
+    harmonics = [
+        (1.0, 1.0),      # Fundamental
+        (2.0, 0.4),      # Segunda armónica (reducida)
+        (3.0, 0.15),     # Tercera armónica (reducida)
+        (4.0, 0.08),     # Cuarta armónica (reducida)
+        (5.0, 0.04),     # Quinta armónica (reducida)
+        (6.0, 0.02),     # Sexta armónica (reducida)
+    ]
+    
+    wave = np.zeros_like(t)
+    for harmonic_freq, harmonic_amp in harmonics:
+        # Añadir slight detuning natural para realismo (muy sutil)
+        detuning = 1.0 + (harmonic_freq - 1) * 0.001  # Muy pequeño desajuste
+        wave += harmonic_amp * np.sin(2 * np.pi * frequency * harmonic_freq * detuning * t)
+    
+    return amplitude * wave
+
+
+def generate_piano_envelope(duration_seconds, sample_rate):
+    """Generar envolvente ADSR típica del piano"""
+    total_samples = int(sample_rate * duration_seconds)
+    
+    # Parámetros ADSR más suaves para piano
+    attack_time = 0.005   # 5ms attack muy rápido
+    decay_time = 0.15     # 150ms decay más suave
+    sustain_level = 0.8   # 80% del volumen máximo (más alto)
+    release_time = min(0.4, duration_seconds * 0.5)  # Release suave
+    
+    attack_samples = int(attack_time * sample_rate)
+    decay_samples = int(decay_time * sample_rate)
+    release_samples = int(release_time * sample_rate)
+    sustain_samples = max(0, total_samples - attack_samples - decay_samples - release_samples)
+    
+    envelope = np.ones(total_samples)
+    
+    # Attack: 0 a 1 con curva exponencial suave
+    if attack_samples > 0:
+        attack_curve = np.linspace(0, 1, attack_samples)
+        # Aplicar curva exponencial para ataque más natural
+        attack_curve = 1 - np.exp(-5 * attack_curve)
+        envelope[:attack_samples] = attack_curve[:total_samples]
+    
+    # Decay: 1 a sustain_level con curva exponencial. En notas cortas la curva
+    # se corta donde acaba la nota (el release pisa luego el final), sin
+    # cambiar su forma
+    if decay_samples > 0:
+        start_idx = min(attack_samples, total_samples)
+        end_idx = min(start_idx + decay_samples, total_samples)
+        decay_curve = np.linspace(0, 1, decay_samples)
+        # Curva exponencial para decay más natural
+        decay_curve = np.exp(-2 * decay_curve)
+        envelope[start_idx:end_idx] = (sustain_level + (1 - sustain_level) * decay_curve)[:end_idx - start_idx]
+    
+    # Sustain: mantener sustain_level
+    if sustain_samples > 0:
+        start_idx = attack_samples + decay_samples
+        end_idx = start_idx + sustain_samples
+        envelope[start_idx:end_idx] = sustain_level
+    
+    # Release: sustain_level a 0 con curva exponencial suave
+    if release_samples > 0:
+        start_idx = total_samples - release_samples
+        release_curve = np.linspace(0, 1, release_samples)
+        # Curva exponencial para release más natural
+        release_curve = sustain_level * np.exp(-3 * release_curve)
+        envelope[start_idx:] = release_curve
+    
+    return envelope
+
+
+def generate_sine_sum(frequency, t, amplitude=0.3, instrument="piano"):
+    """Generar la onda de un instrumento sumando senos (motor original)"""
+    if instrument == "piano":
+        # Generar sonido de piano con armónicos (SIN vibrato)
+        return generate_piano_harmonics(frequency, t, amplitude)
+    elif instrument == "sine":
+        # Tono senoidal simple (original)
+        return amplitude * np.sin(2 * np.pi * frequency * t)
+    elif instrument == "organ":
+        # Sonido de órgano con armónicos específicos
+        return amplitude * (
+            np.sin(2 * np.pi * frequency * t) +
+            0.5 * np.sin(2 * np.pi * frequency * 2 * t) +
+            0.3 * np.sin(2 * np.pi * frequency * 3 * t)
+        )
+    raise ValueError(f"Instrumento desconocido: {instrument}")
+
+
+def get_piano_envelope(duration_seconds, sample_rate):
+    """Envolvente del piano desde envelope_cache (solo lectura, no modificar)"""
+    key = ("piano", duration_seconds, sample_rate)
+    envelope = envelope_cache.get(key)
+    if envelope is None:
+        envelope = generate_piano_envelope(duration_seconds, sample_rate)
+        envelope.setflags(write=False)
+        envelope_cache.put(key, envelope)
+    return envelope
+
+
+@timed('audio.tone')
+def generate_tone(frequency, duration_ms, sample_rate=44100, amplitude=0.3, instrument="piano", engine="wavetable"):
+    """Generar un tono con diferentes tipos de instrumento
+
+    Devuelve una copia modificable de la nota guardada en note_cache.
+    """
+    return get_tone(frequency, duration_ms, sample_rate, amplitude, instrument, engine).copy()
+
+
+def get_tone(frequency, duration_ms, sample_rate=44100, amplitude=0.3, instrument="piano", engine="wavetable"):
+    """Nota sintetizada desde note_cache (solo lectura, no modificar)"""
+    key = (instrument, frequency, duration_ms, sample_rate, amplitude, engine)
+    tone = note_cache.get(key)
+    if tone is None:
+        tone = synthesize_tone(frequency, duration_ms, sample_rate, amplitude, instrument, engine)
+        tone.setflags(write=False)
+        note_cache.put(key, tone)
+    return tone
+
+
+@timed('audio.synthesize')
+def synthesize_tone(frequency, duration_ms, sample_rate=44100, amplitude=0.3, instrument="piano", engine="wavetable"):
+    """Sintetizar un tono sin pasar por la caché
+
+    ``engine="wavetable"`` lee una tabla precalculada por instrumento (mucho
+    más rápido); ``engine="sines"`` usa la suma de senos original. El piano
+    por wavetable usa armónicos exactos, sin el leve desafinado (0.1%) de
+    generate_piano_harmonics.
+    """
+    duration_seconds = duration_ms / 1000.0
+    t = np.linspace(0, duration_seconds, int(sample_rate * duration_seconds))
+    
+    if engine == "wavetable":
+        wave_data = render_wavetable(instrument, frequency, t, sample_rate, amplitude)
+    else:
+        wave_data = generate_sine_sum(frequency, t, amplitude, instrument)
+    
+    if instrument == "piano":
+        # Aplicar envolvente ADSR del piano
+        envelope = get_piano_envelope(duration_seconds, sample_rate)
+        wave_data *= envelope
+        
+    elif instrument == "sine":
+        # Aplicar envolvente simple
+        envelope_length = int(0.01 * sample_rate)  # 10ms fade
+        if len(wave_data) > 2 * envelope_length:
+            wave_data[:envelope_length] *= np.linspace(0, 1, envelope_length)
+            wave_data[-envelope_length:] *= np.linspace(1, 0, envelope_length)
+    
+    elif instrument == "organ":
+        # Envolvente más sostenida para órgano
+        envelope_length = int(0.05 * sample_rate)
+        if len(wave_data) > 2 * envelope_length:
+            wave_data[:envelope_length] *= np.linspace(0, 1, envelope_length)
+            wave_data[-envelope_length:] *= np.linspace(1, 0, envelope_length)
+    
+    return wave_data
+
+
+@timed('audio.scale')
+def render_scale_audio(chord_name, note_duration_ms=700, repetitions=1, ascending=True, descending=True, instrument="piano",
+                       out_path=None):
+    """Generar audio de escala para un acorde (16-bit PCM, sample rate)
+
+    El pico para normalizar se busca antes en las notas distintas de la
+    escala (vienen de note_cache) y cada nota normalizada se copia ya en
+    int16 a su sitio: no hay buffer float de la escala completa. Con
+    ``out_path`` ese sitio es un WAV en disco a través de np.memmap, que se
+    devuelve en lugar de un array.
+    """
+    scale_frequencies = get_scale_notes(chord_name)
+    sample_rate = 44100
+    
+    # Crear secuencia de notas
+    sequence = []
+    
+    for rep in range(repetitions):
+        if ascending:
+            sequence.extend(scale_frequencies)
+        if descending:
+            sequence.extend(reversed(scale_frequencies))
+    
+    silence_duration_ms = 50  # Pequeña pausa entre notas
+    note_samples = int(sample_rate * (note_duration_ms / 1000.0))
+    silence_samples = int(silence_duration_ms * sample_rate / 1000)
+    total_samples = len(sequence) * note_samples + max(len(sequence) - 1, 0) * silence_samples
+    
+    # Primera pasada: pico de las notas distintas de la escala
+    tones = {frequency: get_tone(frequency, note_duration_ms, sample_rate, instrument=instrument)
+             for frequency in dict.fromkeys(sequence)}
+    peak = max((max(tone.max(), -tone.min()) for tone in tones.values() if len(tone)), default=0.0)
+    
+    # Cada nota normalizada y convertida a 16-bit PCM una sola vez
+    pcm_tones = {}
+    for frequency, tone in tones.items():
+        if peak > 0:
+            tone = tone / peak * 0.8
+        pcm_tones[frequency] = (tone * 32767).astype(np.int16)
+    
+    # Segunda pasada: copiar cada nota a su sitio (las pausas ya son ceros)
+    if out_path is not None:
+        audio_16bit = create_wav_memmap(out_path, total_samples, sample_rate)
+    else:
+        audio_16bit = np.zeros(total_samples, dtype=np.int16)
+    position = 0
+    for frequency in sequence:
+        pcm = pcm_tones[frequency]
+        audio_16bit[position:position + len(pcm)] = pcm
+        position += len(pcm) + silence_samples
+    if isinstance(audio_16bit, np.memmap):
+        audio_16bit.flush()
+    
+    return audio_16bit, sample_rate
+
+
+def wav_bytes(audio_data, sample_rate):
+    """Codificar audio 16-bit mono como archivo WAV en memoria"""
+    wav_buffer = io.BytesIO()
+    
+    with wave.open(wav_buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(audio_data.tobytes())
+    
+    return wav_buffer.getvalue()
@@ -0,0 +1,129 @@
+import wave
+
+import numpy as np
+
+from .audio import get_chord_notes, synthesize_tone
+from .profiling import timed
+from .synth import INSTRUMENT_HARMONICS
+from .timeline import ChordTimeline
+
+# Frames por bloque escrito en el WAV
+BLOCK_FRAMES = 65536
+
+
+def voice_amplitude(instrument, voices):
+    """Amplitud por voz para que la suma de ``voices`` notas no sature"""
+    harmonic_sum = sum(amp for _, amp in INSTRUMENT_HARMONICS[instrument])
+    return 0.8 / (harmonic_sum * max(voices, 1))
+
+
+def render_chord_segment(chord_name, duration_s, sample_rate=44100, instrument="piano"):
+    """Renderizar un acorde (todas sus voces sumadas) durante ``duration_s`` segundos"""
+    frequencies = get_chord_notes(chord_name)
+    if not frequencies:
+        return np.zeros(int(sample_rate * duration_s))
+
+    amplitude = voice_amplitude(instrument, len(frequencies))
+    segment = None
+    for frequency in frequencies:
+        tone = synthesize_tone(frequency, duration_s * 1000.0, sample_rate, amplitude, instrument)
+        if segment is None:
+            segment = tone
+        else:
+            length = min(len(segment), len(tone))
+            segment[:length] += tone[:length]
+    return segment
+
+
+class _StreamingMixer:
+    """Mezclador por bloques sobre un WAV abierto.
+
+    Solo guarda en memoria la ventana de frames que todavía puede recibir
+    sonido (desde el inicio del acorde actual hasta el final del más largo
+    pendiente). Lo anterior ya es definitivo y se escribe al archivo.
+    """
+
+    def __init__(self, wav_file, block_frames=BLOCK_FRAMES):
+        self.wav_file = wav_file
+        self.block_frames = block_frames
+        self.window = np.zeros(0)
+        self.window_start = 0
+        self.frames_written = 0
+
+    def add(self, start_frame, segment):
+        """Sumar ``segment`` a la mezcla a partir de ``start_frame``"""
+        self.flush(start_frame)
+        offset = start_frame - self.window_start
+        needed = offset + len(segment)
+        if needed > len(self.window):
+            self.window = np.concatenate([self.window, np.zeros(needed - len(self.window))])
+        self.window[offset:needed] += segment
+
+    def flush(self, until_frame):
+        """Escribir todos los frames anteriores a ``until_frame``"""
+        ready = min(until_frame - self.window_start, len(self.window))
+        for block_start in range(0, ready, self.block_frames):
+            self._write(self.window[block_start:min(block_start + self.block_frames, ready)])
+        self.window = self.window[ready:].copy()
+        self.window_start += ready
+
+        # Silencio entre acordes: se escribe sin reservar memoria
+        while self.window_start < until_frame:
+            gap = min(until_frame - self.window_start, self.block_frames)
+            self._write(np.zeros(gap))
+            self.window_start += gap
+
+    def close(self):
+        self.flush(self.window_start + len(self.window))
+
+    def _write(self, block):
+        pcm = np.clip(block * 32767, -32768, 32767).astype('<i2')
+        self.wav_file.writeframes(pcm.tobytes())
+        self.frames_written += len(pcm)
+
+
+@timed('audio.backing')
+def render_backing_track(chords, output, instrument="piano", sample_rate=44100, mode="overlap",
+                         overlap_ms=80, block_frames=BLOCK_FRAMES, progress=None):
+    """Renderizar la pista de acompañamiento de una canción a un WAV
+
+    ``chords`` es una ChordTimeline (o lista de diccionarios) y ``output`` una
+    ruta o un archivo binario con seek. El WAV se escribe bloque a bloque, así
+    que la memoria depende del acorde más largo y no de la duración total.
+
+    Con ``mode="overlap"`` cada acorde se alarga ``overlap_ms`` y los bordes
+    se funden con ventanas complementarias (overlap-add); con ``mode="cut"``
+    cada acorde dura exactamente de ``start`` a ``end``.
+    ``progress(done, total)`` se llama tras cada acorde.
+    Devuelve el número de frames escritos.
+    """
+    if mode not in ("overlap", "cut"):
+        raise ValueError(f"Modo desconocido: {mode}")
+    timeline = ChordTimeline.coerce(chords)
+    order = np.argsort(timeline.start, kind='stable')
+    fade_frames = int(sample_rate * overlap_ms / 1000.0) if mode == "overlap" else 0
+    if fade_frames:
+        fade_in = np.sin(np.linspace(0, np.pi / 2, fade_frames)) ** 2
+        fade_out = fade_in[::-1].copy()
+
+    with wave.open(output, 'wb') as wav_file:
+        wav_file.setnchannels(1)  # Mono
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(sample_rate)
+        mixer = _StreamingMixer(wav_file, block_frames)
+
+        for done, i in enumerate(order.tolist(), 1):
+            start = max(float(timeline.start[i]), 0.0)
+            duration = float(timeline.end[i]) - start
+            if duration > 0:
+                chord_name = timeline.labels[timeline.codes[i]]
+                segment = render_chord_segment(chord_name, duration + fade_frames / sample_rate, sample_rate, instrument)
+                if fade_frames and len(segment) > 2 * fade_frames:
+                    segment[:fade_frames] *= fade_in
+                    segment[-fade_frames:] *= fade_out
+                mixer.add(int(round(start * sample_rate)), segment)
+            if progress is not None:
+                progress(done, len(order))
+
+        mixer.close()
+    return mixer.frames_written
@@ -0,0 +1,60 @@
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .audio import render_scale_audio, wav_bytes
+
+
+def scale_wav_filename(chord_name, instrument, note_duration_ms):
+    """Nombre del WAV de una escala (el mismo que usa la descarga individual)"""
+    safe_chord = chord_name.strip().replace(':', '_').replace('/', '_')
+    return f"escala_{safe_chord}_{instrument}_{note_duration_ms}ms.wav"
+
+
+def render_scale_wav(chord_name, note_duration_ms=700, repetitions=1, ascending=True, descending=True, instrument="piano"):
+    """Generar el WAV de la escala de un acorde (se ejecuta en los procesos del pool)"""
+    audio_data, sample_rate = render_scale_audio(
+        chord_name, note_duration_ms, repetitions, ascending, descending, instrument
+    )
+    return wav_bytes(audio_data, sample_rate)
+
+
+def export_scales_zip(chord_names, note_duration_ms=700, repetitions=1, ascending=True, descending=True,
+                      instrument="piano", max_workers=None, progress=None):
+    """Generar un ZIP con el WAV de la escala de cada acorde
+
+    Los acordes se reparten en un ProcessPoolExecutor con ``max_workers``
+    procesos (por defecto uno por núcleo). ``progress(done, total, chord_name)``
+    se llama cada vez que termina un acorde. Devuelve ``(zip_bytes, errors)``,
+    donde ``errors`` asocia cada acorde que falló con su mensaje de error.
+    """
+    chord_names = list(dict.fromkeys(chord_names))
+    options = (note_duration_ms, repetitions, ascending, descending, instrument)
+    workers = min(max_workers or os.cpu_count() or 1, max(len(chord_names), 1))
+    errors = {}
+    zip_buffer = io.BytesIO()
+
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+        def store(done, chord_name, compute):
+            try:
+                zip_file.writestr(scale_wav_filename(chord_name, instrument, note_duration_ms), compute())
+            except Exception as e:
+                errors[chord_name] = str(e)
+            if progress is not None:
+                progress(done, len(chord_names), chord_name)
+
+        if workers == 1:
+            # Sin pool: evita el coste de arrancar procesos para un solo acorde
+            for done, chord_name in enumerate(chord_names, 1):
+                store(done, chord_name, lambda: render_scale_wav(chord_name, *options))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(render_scale_wav, chord_name, *options): chord_name
+                    for chord_name in chord_names
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    store(done, futures[future], future.result)
+
+    return zip_buffer.getvalue(), errors
@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+
+# Valor por defecto de los límites que no se cambian (None quita el límite)
+_KEEP = object()
+
+
+def nbytes(value):
+    """Tamaño en bytes de un array de NumPy (o de cualquier objeto con ``nbytes``)"""
+    return value.nbytes
+
+
+class LRUCache:
+    """Caché LRU acotada con contadores de aciertos y fallos.
+
+    Se limita por número de entradas (``maxsize``) y, opcionalmente, por
+    bytes (``max_bytes``), midiendo cada valor con ``sizeof``.
+
+    Vive en el paquete (no en ``streamlit_app.py``) porque Streamlit vuelve a
+    ejecutar el script en cada interacción, pero los módulos importados se
+    conservan entre ejecuciones y entre sesiones.
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.current_bytes = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Devolver el valor de ``key`` marcándolo como usado recientemente"""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        """Guardar ``value`` y descartar las entradas más antiguas si hace falta"""
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                # No cabe ni con la caché vacía; tampoco vale ya el valor anterior
+                if key in self._data:
+                    del self._data[key]
+                    self.current_bytes -= self._sizes.pop(key)
+                return
+            if key in self._data:
+                self.current_bytes -= self._sizes[key]
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self.current_bytes += size
+            self._evict()
+
+    def set_limits(self, maxsize=_KEEP, max_bytes=_KEEP):
+        """Cambiar los límites y descartar lo que ya no quepa
+
+        Los que no se pasan se mantienen; ``max_bytes=None`` quita el límite
+        en bytes.
+        """
+        with self._lock:
+            if maxsize is not _KEEP:
+                self.maxsize = maxsize
+            if max_bytes is not _KEEP:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self._data and (
+            len(self._data) > self.maxsize
+            or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+        ):
+            key, _ = self._data.popitem(last=False)
+            size = self._sizes.pop(key)
+            self.current_bytes -= size
+            self.evicted_bytes += size
+            self.evictions += 1
+
+    def clear(self):
+        """Vaciar la caché y reiniciar los contadores"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.evictions = self.evicted_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self):
+        """Contadores de uso de la caché"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'evicted_bytes': self.evicted_bytes,
+        }
+
+
+# Charts de texto ya renderizados, por (hash de la canción, parámetros de layout);
+# acotada por caracteres: un chart de 1M acordes ocupa unos 48 MB y no se guarda
+chart_cache = LRUCache(maxsize=64, max_bytes=32 * 1024 * 1024, sizeof=len)
+
+# PDFs ya generados (bytes), por (hash de la canción, parámetros de layout, título)
+pdf_cache = LRUCache(maxsize=16, max_bytes=64 * 1024 * 1024, sizeof=len)
+
+# Notas ya sintetizadas, por (instrumento, frecuencia, duración, sample rate, ...)
+note_cache = LRUCache(maxsize=1024, max_bytes=64 * 1024 * 1024, sizeof=nbytes)
+
+# Envolventes ADSR, por (instrumento, duración, sample rate)
+envelope_cache = LRUCache(maxsize=64, max_bytes=16 * 1024 * 1024, sizeof=nbytes)
+
+
+def song_entry_nbytes(entry):
+    """Tamaño de una entrada de ``song_cache``: (timeline, filas inválidas)"""
+    timeline, invalid_rows = entry
+    return timeline.nbytes + sum(len(row) for row in invalid_rows)
+
+
+# Canciones ya leídas y validadas, por (ruta, mtime, tamaño) o por hash del
+# archivo subido; compartida entre ejecuciones y sesiones de Streamlit
+song_cache = LRUCache(maxsize=256, max_bytes=256 * 1024 * 1024, sizeof=song_entry_nbytes)
+
+
+def midi_notes_nbytes(notes):
+    """Tamaño de una entrada de ``midi_cache`` (columnas de MidiNotes)"""
+    return sum(column.nbytes for column in notes)
+
+
+# Notas ya leídas de cada MIDI, por (ruta, mtime, tamaño)
+midi_cache = LRUCache(maxsize=64, max_bytes=64 * 1024 * 1024, sizeof=midi_notes_nbytes)
+
+
+def configure_audio_cache(note_bytes=_KEEP, envelope_bytes=_KEEP):
+    """Ajustar los límites en bytes de las cachés de notas y envolventes
+
+    Igual que en ``LRUCache.set_limits``, None quita el límite.
+    """
+    note_cache.set_limits(max_bytes=note_bytes)
+    envelope_cache.set_limits(max_bytes=envelope_bytes)
@@ -0,0 +1,228 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .cache import chart_cache
+from .chords import simplify_chord
+from .profiling import timed
+from .timeline import ChordTimeline
+
+
+def convert_to_beats(chords, bpm, offset=0.0, tempo_map=None):
+    """Convertir tiempos en segundos a beats (el beat 0 está en ``offset`` segundos)
+
+    Con un ``tempo_map`` (chordchart.tempomap.TempoMap) el tempo puede
+    variar a lo largo de la canción y ``bpm`` y ``offset`` se ignoran.
+
+    Con una ChordTimeline devuelve los arrays (start_beat, end_beat). Con una
+    lista de diccionarios agrega las claves 'start_beat' y 'end_beat' a cada
+    elemento, como antes.
+    """
+    if isinstance(chords, ChordTimeline):
+        return _timeline_beats(chords, bpm, offset, tempo_map)
+    
+    # Adaptador para listas de diccionarios
+    start_beats, end_beats = _timeline_beats(ChordTimeline.from_records(chords), bpm, offset, tempo_map)
+    for c, start_beat, end_beat in zip(chords, start_beats.tolist(), end_beats.tolist()):
+        c['start_beat'] = start_beat
+        c['end_beat'] = end_beat
+    return chords
+
+
+def _timeline_beats(timeline, bpm, offset, tempo_map):
+    if tempo_map is None:
+        return timeline.to_beats(bpm, offset)
+    return tempo_map.to_beats(timeline.start), tempo_map.to_beats(timeline.end)
+
+
+def _chart_key(timeline, *layout, tempo_map=None):
+    """Clave de caché de un chart: hash de la canción, layout y mapa de tempo"""
+    return (timeline.digest(), *layout, tempo_map.digest() if tempo_map is not None else None)
+
+
+@timed('chart.generate')
+def generate_chord_chart(chords, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset=0.0,
+                         tempo_map=None):
+    """Generar el chart de acordes como texto
+
+    El compás 1 empieza en ``offset`` segundos (ver chordchart.tempo para
+    estimarlo junto con el tempo); con ``tempo_map`` los beats salen del mapa
+    de tempo (ver convert_to_beats). No modifica ``chords``. El resultado se guarda en ``chart_cache`` por hash
+    de la canción y parámetros de layout, así que mover los sliders a valores
+    ya vistos no vuelve a renderizar.
+    """
+    if not chords:
+        return "No hay datos de acordes disponibles"
+    
+    timeline = ChordTimeline.coerce(chords)
+    key = _chart_key(timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map=tempo_map)
+    chart_text = chart_cache.get(key)
+    if chart_text is None:
+        chart_text = render_chord_chart(
+            timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map
+        )
+        chart_cache.put(key, chart_text)
+    return chart_text
+
+
+@timed('chart.render')
+def render_chord_chart(timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset=0.0,
+                       tempo_map=None):
+    """Renderizar el chart de una ChordTimeline (función pura, sin caché)"""
+    systems = iter_chart_systems(
+        timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map
+    )
+    return '\n'.join(f"{system}\n" for system in systems)
+
+
+# Límite de caracteres para guardar en caché un chart generado por streaming
+STREAM_CACHE_MAX_CHARS = 2_000_000
+
+
+def iter_chord_chart(chords, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset=0.0,
+                     tempo_map=None):
+    """Generar el chart sistema por sistema (acordes, barras y números de compás)
+
+    Cada elemento es un sistema de tres líneas sin salto final; unidos con
+    líneas vacías forman el mismo texto que generate_chord_chart. Si el chart
+    ya está en caché se recorre desde allí; si no, se renderiza de forma
+    perezosa y solo se guarda en caché cuando es pequeño.
+    """
+    if not chords:
+        yield "No hay datos de acordes disponibles"
+        return
+    
+    timeline = ChordTimeline.coerce(chords)
+    key = _chart_key(timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map=tempo_map)
+    chart_text = chart_cache.get(key)
+    if chart_text is not None:
+        # Recorrer el texto en caché sin partirlo entero en memoria
+        pos = 0
+        while pos < len(chart_text):
+            end = chart_text.find('\n\n', pos)
+            if end == -1:
+                end = len(chart_text) - 1
+            yield chart_text[pos:end]
+            pos = end + 2
+        return
+    
+    collected = []
+    collected_chars = 0
+    systems = iter_chart_systems(
+        timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map
+    )
+    for system in systems:
+        if collected is not None:
+            collected.append(system)
+            collected_chars += len(system) + 2
+            if collected_chars > STREAM_CACHE_MAX_CHARS:
+                collected = None
+        yield system
+    
+    if collected is not None:
+        chart_cache.put(key, '\n'.join(f"{system}\n" for system in collected))
+
+
+ChartRow = namedtuple('ChartRow', ['start_measure', 'end_measure', 'beats', 'labels'])
+ChartRow.__doc__ = """Un sistema del chart.
+
+``beats`` son los inicios de sus acordes en beats desde el comienzo del
+sistema y ``labels`` sus nombres simplificados, en el orden del archivo.
+"""
+
+
+def iter_chart_rows(timeline, bpm, beats_per_measure, measures_per_line, offset=0.0, tempo_map=None):
+    """Repartir los acordes de una ChordTimeline por sistemas (ChartRow)
+
+    Base común de los renderizadores de texto y de PDF. Los acordes que
+    empiezan antes del compás 1 se colocan al inicio del compás 1.
+    """
+    # Simplificar acordes (una vez por acorde distinto) y convertir a beats
+    timeline = timeline.map_labels(simplify_chord)
+    start_beats, end_beats = convert_to_beats(timeline, bpm, offset, tempo_map)
+    start_beats = np.maximum(start_beats, 0.0)
+    labels = timeline.labels
+    
+    # Calcular total de medidas
+    max_beat = float(end_beats.max())
+    total_measures = int(max_beat // beats_per_measure) + 1
+    
+    # Ordenar una sola vez por start_beat y repartir los acordes por línea
+    # con búsqueda binaria: cada sistema solo recorre sus propios acordes
+    order = np.argsort(start_beats, kind='stable')
+    sorted_beats = start_beats[order]
+    line_starts = np.arange(0, total_measures + measures_per_line, measures_per_line)
+    line_starts = np.minimum(line_starts, total_measures) * beats_per_measure
+    bucket_bounds = np.searchsorted(sorted_beats, line_starts, side='left').tolist()
+    
+    for line_index, start_measure in enumerate(range(0, total_measures, measures_per_line)):
+        end_measure = min(start_measure + measures_per_line, total_measures)
+        # Acordes del sistema en el orden original del archivo
+        in_line = np.sort(order[bucket_bounds[line_index]:bucket_bounds[line_index + 1]])
+        yield ChartRow(
+            start_measure,
+            end_measure,
+            start_beats[in_line] - start_measure * beats_per_measure,
+            [labels[code] for code in timeline.codes[in_line].tolist()],
+        )
+
+
+def iter_chart_systems(timeline, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset=0.0,
+                       tempo_map=None):
+    """Renderizar los sistemas de una ChordTimeline uno a uno (sin caché)"""
+    for row in iter_chart_rows(timeline, bpm, beats_per_measure, measures_per_line, offset, tempo_map):
+        start_measure, end_measure = row.start_measure, row.end_measure
+        
+        # Calcular longitud de la línea
+        line_length = int((end_measure - start_measure) * beats_per_measure * chars_per_beat)
+        
+        # Inicializar líneas
+        chord_line = [' '] * line_length
+        bar_line = ['/'] * line_length
+        
+        # Colocar barras de compás
+        for m in range(start_measure, end_measure + 1):
+            beat_pos = (m - start_measure) * beats_per_measure
+            char_pos = int(beat_pos * chars_per_beat)
+            if char_pos < line_length:
+                bar_line[char_pos] = '|'
+        
+        # Colocar acordes en sus start_beat
+        char_positions = (row.beats * chars_per_beat).astype(np.int64)
+        for char_pos, chord in zip(char_positions.tolist(), row.labels):
+            # Limpiar espacio para el acorde
+            for i in range(len(chord)):
+                if char_pos + i < line_length:
+                    chord_line[char_pos + i] = ' '
+            # Colocar el acorde
+            for i, char in enumerate(chord):
+                if char_pos + i < line_length:
+                    chord_line[char_pos + i] = char
+        
+        # Agregar números de compás
+        measure_line = [' '] * line_length
+        for m in range(start_measure, end_measure):
+            beat_pos = (m - start_measure) * beats_per_measure
+            char_pos = int(beat_pos * chars_per_beat)
+            measure_num = str(m + 1)
+            if char_pos < line_length:
+                measure_line[char_pos] = measure_num[0] if len(measure_num) == 1 else measure_num[0]
+                if len(measure_num) > 1 and char_pos + 1 < line_length:
+                    measure_line[char_pos + 1] = measure_num[1]
+        
+        # Unir líneas
+        chord_str = ''.join(chord_line)
+        bar_str = ''.join(bar_line)
+        measure_str = ''.join(measure_line)
+        
+        yield f"{chord_str}\n{bar_str}\n{measure_str}"
+
+
+def iter_chart_lines(chart):
+    """Recorrer las líneas de un chart dado como texto o como iterable de sistemas"""
+    if isinstance(chart, str):
+        yield from chart.split('\n')
+        return
+    for system in chart:
+        yield from system.split('\n')
+        yield ''  # Línea vacía entre sistemas
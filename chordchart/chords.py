@@ -0,0 +1,233 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Clase de altura (0 = C) de cada letra
+LETTER_PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+NOTE_NAMES_SHARP = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+NOTE_NAMES_FLAT = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
+
+# Tipos de acorde normalizados; el índice es el código usado en los arrays
+QUALITIES = [
+    'maj', 'min', '7', 'maj7', 'min7', 'dim', 'dim7', 'hdim7', 'aug',
+    'sus2', 'sus4', '6', 'min6', '9', 'maj9', 'min9', 'minmaj7', '5', '1',
+]
+QUALITY_CODES = {quality: code for code, quality in enumerate(QUALITIES)}
+
+# Notación Harte (G:maj, A:min7) y abreviada (G, Am7) -> tipo normalizado
+QUALITY_ALIASES = {
+    '': 'maj', 'maj': 'maj', 'M': 'maj',
+    'm': 'min', 'min': 'min', '-': 'min',
+    '7': '7', 'dom7': '7',
+    'maj7': 'maj7', 'M7': 'maj7',
+    'm7': 'min7', 'min7': 'min7', '-7': 'min7',
+    'dim': 'dim', 'o': 'dim',
+    'dim7': 'dim7', 'o7': 'dim7',
+    'hdim7': 'hdim7', 'hdim': 'hdim7', 'm7b5': 'hdim7',
+    'aug': 'aug', '+': 'aug',
+    'sus2': 'sus2', 'sus4': 'sus4', 'sus': 'sus4',
+    '6': '6', 'maj6': '6',
+    'm6': 'min6', 'min6': 'min6',
+    '9': '9', 'maj9': 'maj9', 'm9': 'min9', 'min9': 'min9',
+    'minmaj7': 'minmaj7', 'mmaj7': 'minmaj7',
+    '5': '5', '1': '1',
+}
+_ALIASES_BY_LENGTH = sorted(QUALITY_ALIASES, key=len, reverse=True)
+
+# Sufijo con el que se muestra cada tipo en el chart
+QUALITY_SUFFIXES = {
+    'maj': '', 'min': 'm', '7': '7', 'maj7': 'maj7', 'min7': 'm7',
+    'dim': 'dim', 'dim7': 'dim7', 'hdim7': 'm7b5', 'aug': 'aug',
+    'sus2': 'sus2', 'sus4': 'sus4', '6': '6', 'min6': 'm6',
+    '9': '9', 'maj9': 'maj9', 'min9': 'm9', 'minmaj7': 'm(maj7)', '5': '5', '1': '1',
+}
+
+# Intervalos de la escala de cada tipo de acorde (en semitonos)
+MAJOR_SCALE = [0, 2, 4, 5, 7, 9, 11]
+NATURAL_MINOR_SCALE = [0, 2, 3, 5, 7, 8, 10]
+SCALE_INTERVALS = {
+    'maj': MAJOR_SCALE,                   # Mayor
+    'min': NATURAL_MINOR_SCALE,           # Menor natural
+    '7': [0, 2, 4, 5, 7, 9, 10],          # Dominante
+    'maj7': MAJOR_SCALE,                  # Mayor séptima
+    'min7': NATURAL_MINOR_SCALE,          # Menor séptima
+}
+
+# Intervalos de las notas de cada tipo de acorde (en semitonos)
+CHORD_TONES = {
+    'maj': [0, 4, 7],
+    'min': [0, 3, 7],
+    '7': [0, 4, 7, 10],
+    'maj7': [0, 4, 7, 11],
+    'min7': [0, 3, 7, 10],
+    'dim': [0, 3, 6],
+    'dim7': [0, 3, 6, 9],
+    'hdim7': [0, 3, 6, 10],
+    'aug': [0, 4, 8],
+    'sus2': [0, 2, 7],
+    'sus4': [0, 5, 7],
+    '6': [0, 4, 7, 9],
+    'min6': [0, 3, 7, 9],
+    '9': [0, 4, 7, 10, 14],
+    'maj9': [0, 4, 7, 11, 14],
+    'min9': [0, 3, 7, 10, 14],
+    'minmaj7': [0, 3, 7, 11],
+    '5': [0, 7],
+    '1': [0],
+}
+
+# Grados de la escala mayor, para bajos en notación Harte (G:maj/5)
+DEGREE_INTERVALS = {'1': 0, '2': 2, '3': 4, '4': 5, '5': 7, '6': 9, '7': 11, '9': 2, '11': 5, '13': 9}
+
+# Etiquetas de "sin acorde" que exportan algunos detectores
+NO_CHORD_LABELS = {'N', 'X', ''}
+
+ChordSymbol = namedtuple('ChordSymbol', ['label', 'root', 'quality', 'extensions', 'bass'])
+ChordSymbol.__doc__ = """Acorde analizado.
+
+``root`` y ``bass`` son clases de altura (0 = C) o None; ``quality`` es uno
+de QUALITIES (None si no se reconoce la raíz); ``extensions`` es una tupla
+de textos como '9' o 'add9'.
+"""
+
+ChordColumn = namedtuple('ChordColumn', ['symbols', 'codes', 'root', 'quality', 'bass'])
+ChordColumn.__doc__ = """Columna de acordes analizada en bloque.
+
+``symbols`` tiene un ChordSymbol por etiqueta distinta y ``codes`` el índice
+de cada etiqueta en ``symbols``. ``root``, ``quality`` y ``bass`` son arrays
+int8 alineados con la columna original (-1 donde no aplica).
+"""
+
+# Memo de etiquetas ya analizadas (el vocabulario de acordes es pequeño)
+_parse_cache = {}
+PARSE_CACHE_MAX_ENTRIES = 4096
+
+
+def parse_note_name(name):
+    """Separar una nota ('C#', 'Eb4') en (clase de altura, resto del texto)
+
+    Devuelve (None, name) si no empieza por una letra de nota.
+    """
+    if not name or name[0] not in LETTER_PITCH_CLASSES:
+        return None, name
+    pitch_class = LETTER_PITCH_CLASSES[name[0]]
+    i = 1
+    while i < len(name) and name[i] in '#b':
+        pitch_class += 1 if name[i] == '#' else -1
+        i += 1
+    return pitch_class % 12, name[i:]
+
+
+def _parse_bass(text, root):
+    if not text:
+        return None
+    pitch_class, rest = parse_note_name(text)
+    if pitch_class is not None and not rest:
+        return pitch_class
+    # Grado relativo a la raíz (notación Harte), con alteraciones delante
+    shift = 0
+    while text and text[0] in '#b':
+        shift += 1 if text[0] == '#' else -1
+        text = text[1:]
+    if text in DEGREE_INTERVALS:
+        return (root + DEGREE_INTERVALS[text] + shift) % 12
+    return None
+
+
+def _parse_uncached(label):
+    text = label.strip()
+    if text in NO_CHORD_LABELS:
+        return ChordSymbol(label, None, None, (), None)
+
+    root, rest = parse_note_name(text)
+    if root is None:
+        return ChordSymbol(label, None, None, (), None)
+
+    rest, _, bass_text = rest.partition('/')
+    if rest.startswith(':'):
+        rest = rest[1:]
+
+    extensions = ()
+    if '(' in rest and rest.endswith(')'):
+        rest, _, inner = rest[:-1].partition('(')
+        extensions = tuple(e.strip() for e in inner.split(',') if e.strip())
+
+    quality_text = next(alias for alias in _ALIASES_BY_LENGTH if rest.startswith(alias))
+    if rest[len(quality_text):]:
+        extensions = (rest[len(quality_text):],) + extensions
+
+    return ChordSymbol(label, root, QUALITY_ALIASES[quality_text], extensions, _parse_bass(bass_text, root))
+
+
+def parse_chord(label):
+    """Analizar un nombre de acorde (notación Harte o abreviada) con memo"""
+    symbol = _parse_cache.get(label)
+    if symbol is None:
+        if len(_parse_cache) >= PARSE_CACHE_MAX_ENTRIES:
+            _parse_cache.clear()
+        symbol = _parse_uncached(label)
+        _parse_cache[label] = symbol
+    return symbol
+
+
+def parse_chord_column(labels):
+    """Analizar una columna completa de nombres de acorde en una sola pasada
+
+    Cada etiqueta distinta se analiza una vez; el resto de la columna solo
+    se indexa.
+    """
+    table = {}
+    codes = np.fromiter(
+        (table.setdefault(label, len(table)) for label in labels),
+        dtype=np.int32,
+        count=len(labels)
+    )
+    symbols = [parse_chord(label) for label in table]
+
+    def column(values):
+        return np.array([-1 if v is None else v for v in values], dtype=np.int8)[codes]
+
+    return ChordColumn(
+        symbols,
+        codes,
+        column(s.root for s in symbols),
+        column(None if s.quality is None else QUALITY_CODES[s.quality] for s in symbols),
+        column(s.bass for s in symbols),
+    )
+
+
+def note_name(pitch_class, prefer_flats=False):
+    """Nombre de una clase de altura con sostenidos o bemoles"""
+    return (NOTE_NAMES_FLAT if prefer_flats else NOTE_NAMES_SHARP)[pitch_class % 12]
+
+
+def format_chord(symbol, root_name=None, prefer_flats=None):
+    """Texto abreviado de un ChordSymbol (G, Am7, D/F#)
+
+    El bajo se escribe con bemoles si ``prefer_flats`` (por defecto, si la
+    raíz lleva bemol).
+    """
+    if symbol.root is None:
+        return symbol.label
+    if root_name is None:
+        # Conservar la grafía original de la raíz (C#, Db...)
+        text = symbol.label.strip()
+        root_name = text[:len(text) - len(parse_note_name(text)[1])]
+    text = root_name + QUALITY_SUFFIXES[symbol.quality]
+    if symbol.extensions:
+        extra = [e for e in symbol.extensions if e]
+        text += extra[0] if len(extra) == 1 and not extra[0][0].isdigit() else f"({','.join(extra)})"
+    if symbol.bass is not None:
+        if prefer_flats is None:
+            prefer_flats = 'b' in root_name[1:]
+        text += '/' + note_name(symbol.bass, prefer_flats)
+    return text
+
+
+def simplify_chord(chord):
+    """Simplificar notación de acordes"""
+    symbol = parse_chord(chord)
+    if symbol.root is None:
+        return chord
+    return format_chord(symbol)
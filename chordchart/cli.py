@@ -0,0 +1,263 @@
+"""Generar charts de texto y PDF para todos los CSV de acordes de un directorio
+
+Uso: python -m chordchart DIRECTORIO [-o SALIDA] [--bpm 120] [-j 4]
+
+No importa Streamlit. Si junto a un CSV hay un CSV de beats
+(``cancion.beats.csv``, ver chordchart.tempomap) el chart sigue ese mapa de
+tempo; si no, sin ``--bpm`` ni ``--offset`` el tempo y el inicio del compás
+1 se estiman de cada CSV (chordchart.tempo). Los CSV que no cambiaron desde la última ejecución
+(y con los mismos parámetros) se omiten; ``--force`` los regenera. Con
+CHORDCHART_PROFILE se miden las etapas de cada archivo (chordchart.profiling).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .profiling import PROFILE_JSON_ENV, instrumentation, merge_reports
+
+# Registro de lo ya generado en el directorio de salida
+MANIFEST_NAME = '.chordchart-manifest.json'
+
+# Versión de los archivos generados; cambiarla regenera todo lo anterior
+OUTPUT_VERSION = 2
+
+
+def chart_basename(csv_name):
+    """Nombre base de los archivos de salida (el mismo que usa la descarga de la app)"""
+    return csv_name.replace('.csv', '').replace(' ', '_')
+
+
+def convert_csv(csv_path, output_dir, layout, pdf=True):
+    """Generar el chart de texto (y el PDF) de un CSV; se ejecuta en los procesos del pool
+
+    ``layout`` es (bpm, beats por compás, compases por línea, caracteres
+    por beat, offset, semitonos, cejilla, alteraciones); ``bpm`` u
+    ``offset`` en None se estiman del CSV y las alteraciones son una clave
+    de chordchart.transpose.SPELLINGS. El
+    CSV de beats junto al archivo, si existe, tiene prioridad sobre ambos.
+    Devuelve un diccionario con el número de acordes, el tempo usado (el
+    mediano con mapa de tempo) y los segundos de cada etapa.
+    """
+    from .chart import generate_chord_chart
+    from .tempo import tempo_defaults
+    from .tempomap import load_sidecar_tempo_map
+    from .timelinefile import load_csv_timeline
+    from .transpose import SPELLINGS, transpose_chords, transposition_label
+
+    timings = {}
+    t0 = time.perf_counter()
+    timeline = load_csv_timeline(csv_path)
+    tempo_map = load_sidecar_tempo_map(csv_path)
+    t1 = time.perf_counter()
+    bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, semitones, capo, spelling = layout
+    if tempo_map is not None:
+        bpm = tempo_map.bpm
+    elif bpm is None or offset is None:
+        estimated_bpm, estimated_offset, _ = tempo_defaults(timeline, beats_per_measure, bpm)
+        bpm = estimated_bpm
+        offset = estimated_offset if offset is None else offset
+    chords = transpose_chords(timeline, semitones, capo, SPELLINGS[spelling])
+    chart_text = generate_chord_chart(
+        chords, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map
+    )
+    t2 = time.perf_counter()
+    timings['load'] = t1 - t0
+    timings['chart'] = t2 - t1
+
+    name = os.path.basename(csv_path)
+    base = os.path.join(output_dir, chart_basename(name))
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(chart_text)
+    if pdf:
+        from .pdf import generate_chart_pdf, pdf_bytes
+        title = f"Chart de Acordes - {name}"
+        if transposition_label(semitones, capo):
+            title += f" ({transposition_label(semitones, capo)})"
+        document = generate_chart_pdf(
+            chords, bpm, beats_per_measure, measures_per_line, title, offset, tempo_map
+        )
+        with open(base + '.pdf', 'wb') as f:
+            f.write(pdf_bytes(document))
+        timings['pdf'] = time.perf_counter() - t2
+    timings['chords'] = len(timeline)
+    timings['bpm'] = bpm
+    if instrumentation.enabled:
+        # Medidas de este archivo (el proceso del pool no comparte las suyas)
+        timings['profile'] = instrumentation.to_dict(clear=True)
+    return timings
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def input_signature(csv_path, layout, pdf):
+    """Lo que determina la salida de un CSV: su mtime y tamaño (y los de su
+    CSV de beats), los parámetros y OUTPUT_VERSION"""
+    from .tempomap import tempo_map_path
+
+    file_stat = os.stat(csv_path)
+    try:
+        beats_stat = os.stat(tempo_map_path(csv_path))
+        tempo_map = [beats_stat.st_mtime_ns, beats_stat.st_size]
+    except FileNotFoundError:
+        tempo_map = None
+    return {
+        'mtime_ns': file_stat.st_mtime_ns, 'size': file_stat.st_size, 'tempo_map': tempo_map,
+        'layout': list(layout), 'pdf': pdf, 'version': OUTPUT_VERSION,
+    }
+
+
+def is_up_to_date(csv_path, output_dir, signature, manifest):
+    base = os.path.join(output_dir, chart_basename(os.path.basename(csv_path)))
+    outputs = [base + '.txt'] + ([base + '.pdf'] if signature['pdf'] else [])
+    return manifest.get(os.path.basename(csv_path)) == signature and all(map(os.path.exists, outputs))
+
+
+def run_batch(csv_paths, output_dir, layout, pdf=True, max_workers=None, force=False, report=None):
+    """Convertir ``csv_paths`` en paralelo omitiendo los que no cambiaron
+
+    ``report(name, result)`` se llama al terminar cada archivo; ``result`` es
+    el diccionario de convert_csv, ``'omitido'`` o el texto del error.
+    Devuelve ``{nombre: resultado}``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    results = {}
+    pending = {}
+    for csv_path in csv_paths:
+        name = os.path.basename(csv_path)
+        signature = input_signature(csv_path, layout, pdf)
+        if not force and is_up_to_date(csv_path, output_dir, signature, manifest):
+            results[name] = 'omitido'
+            if report is not None:
+                report(name, results[name])
+        else:
+            pending[csv_path] = signature
+
+    def store(csv_path, compute):
+        name = os.path.basename(csv_path)
+        try:
+            results[name] = compute()
+            manifest[name] = pending[csv_path]
+        except Exception as e:
+            results[name] = f"error: {e}"
+            manifest.pop(name, None)
+        if report is not None:
+            report(name, results[name])
+
+    workers = min(max_workers or os.cpu_count() or 1, max(len(pending), 1))
+    try:
+        if workers == 1:
+            # Sin pool: evita el coste de arrancar procesos
+            for csv_path in pending:
+                store(csv_path, lambda: convert_csv(csv_path, output_dir, layout, pdf))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(convert_csv, csv_path, output_dir, layout, pdf): csv_path
+                    for csv_path in pending
+                }
+                for future in as_completed(futures):
+                    store(futures[future], future.result)
+    finally:
+        save_manifest(output_dir, manifest)
+    return results
+
+
+def format_result(name, result):
+    if isinstance(result, str):
+        return f"{name:<50} {result}"
+    stages = f"{result['load']:>8.3f} {result['chart']:>8.3f} {result.get('pdf', 0.0):>8.3f}"
+    total = result['load'] + result['chart'] + result.get('pdf', 0.0)
+    return f"{name:<50} {result['chords']:>7} {result['bpm']:>7.2f} {stages} {total:>8.3f}"
+
+
+def report_profile(results):
+    """Volcar las medidas por etapa de todos los archivos (CHORDCHART_PROFILE)
+
+    Se escriben como JSON en CHORDCHART_PROFILE_JSON o, si no está
+    definida, como tabla en stderr.
+    """
+    report = merge_reports([r['profile'] for r in results.values() if isinstance(r, dict) and 'profile' in r])
+    path = os.environ.get(PROFILE_JSON_ENV)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    else:
+        print(f"\n{'etapa':<24} {'llamadas':>8} {'total s':>9} {'máx s':>9} {'pico MB':>9}", file=sys.stderr)
+        for name, stage in sorted(report['stages'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"{name:<24} {stage['calls']:>8} {stage['seconds']:>9.3f} {stage['max_seconds']:>9.3f} "
+                  f"{stage['peak_bytes'] / 1e6:>9.1f}", file=sys.stderr)
+    profile = instrumentation.profile_text()
+    if profile:
+        print(profile, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chordchart', description=__doc__.splitlines()[0]
+    )
+    parser.add_argument('directory', help="Directorio con los CSV de acordes")
+    parser.add_argument('-o', '--output', help="Directorio de salida (por defecto DIRECTORIO/charts)")
+    parser.add_argument('--bpm', type=float, default=None, help="Tempo (por defecto se estima de cada CSV)")
+    parser.add_argument('--beats-per-measure', type=int, default=4)
+    parser.add_argument('--measures-per-line', type=int, default=4)
+    parser.add_argument('--chars-per-beat', type=int, default=8)
+    parser.add_argument('--offset', type=float, default=None,
+                        help="Segundos en que empieza el compás 1 (por defecto se estima de cada CSV)")
+    parser.add_argument('--transpose', type=int, default=0, help="Semitonos a transportar (positivo: subir)")
+    parser.add_argument('--capo', type=int, default=0, help="Traste de la cejilla: se escriben las posiciones")
+    parser.add_argument('--spelling', choices=['auto', 'sharps', 'flats'], default='auto',
+                        help="Alteraciones de los acordes transportados (por defecto según el tono)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Procesos (por defecto uno por núcleo)")
+    parser.add_argument('--no-pdf', action='store_true', help="Generar solo los charts de texto")
+    parser.add_argument('--force', action='store_true', help="Regenerar aunque el CSV no haya cambiado")
+    args = parser.parse_args(argv)
+
+    from .tempomap import is_tempo_map_file
+
+    csv_paths = sorted(
+        os.path.join(args.directory, name) for name in os.listdir(args.directory)
+        if name.endswith('.csv') and not is_tempo_map_file(name)
+    )
+    if not csv_paths:
+        print(f"No se encontraron archivos CSV en {args.directory}", file=sys.stderr)
+        return 1
+
+    output_dir = args.output or os.path.join(args.directory, 'charts')
+    layout = (
+        args.bpm, args.beats_per_measure, args.measures_per_line, args.chars_per_beat, args.offset,
+        args.transpose, args.capo, args.spelling
+    )
+
+    print(f"{'archivo':<50} {'acordes':>7} {'bpm':>7} {'carga s':>8} {'chart s':>8} {'pdf s':>8} {'total s':>8}")
+    t0 = time.perf_counter()
+    results = run_batch(
+        csv_paths, output_dir, layout, pdf=not args.no_pdf, max_workers=args.workers, force=args.force,
+        report=lambda name, result: print(format_result(name, result), flush=True)
+    )
+    elapsed = time.perf_counter() - t0
+
+    if instrumentation.enabled:
+        report_profile(results)
+
+    done = sum(isinstance(r, dict) for r in results.values())
+    skipped = sum(r == 'omitido' for r in results.values())
+    failed = len(results) - done - skipped
+    print(f"\n{done} generados, {skipped} omitidos, {failed} con error en {elapsed:.2f} s -> {output_dir}")
+    return 1 if failed else 0
@@ -0,0 +1,18 @@
+class ChordChartError(Exception):
+    """Error de la librería con un mensaje listo para mostrar al usuario.
+
+    Las funciones del paquete no muestran nada: lanzan estas excepciones y
+    cada interfaz (Streamlit, CLI) decide cómo presentarlas.
+    """
+
+
+class ChordDataError(ChordChartError, ValueError):
+    """Datos de acordes (CSV, MIDI) que no se pueden leer.
+
+    ``diagnostics`` lleva los avisos por fila ("Fila N: ...") reunidos antes
+    del error, si los hay.
+    """
+
+    def __init__(self, message, diagnostics=()):
+        super().__init__(message)
+        self.diagnostics = list(diagnostics)
@@ -0,0 +1,166 @@
+import numpy as np
+
+from .errors import ChordDataError
+from .timeline import ChordTimeline
+
+REQUIRED_COLUMNS = ('chord', 'start', 'end')
+
+ENCODING_ERROR = "Error de codificación. Asegúrate de que el archivo esté en formato UTF-8"
+
+# Filas por bloque al leer CSV grandes; acota la memoria del parser
+CHUNK_ROWS = 500_000
+
+
+def _rewind(source, position):
+    if position is not None:
+        source.seek(position)
+
+
+def _parse_times(values, first_row, invalid):
+    """Columna de tiempos como float64
+
+    pandas ya la convierte (con ``float_precision='round_trip'``, igual que
+    ``float()``) cuando todas las celdas son números. Si alguna no lo es, la
+    columna llega como texto y se convierte con ``float()`` para conservar
+    su semántica exacta y el mensaje de error de cada fila.
+    """
+    if values.dtype.kind in 'fiu':
+        return values.to_numpy(dtype=np.float64)
+    cells = values.astype(str).to_numpy()
+    try:
+        return cells.astype(np.float64)
+    except ValueError:
+        pass
+    times = np.full(len(cells), np.nan)
+    for i, cell in enumerate(cells.tolist()):
+        try:
+            times[i] = float(cell)
+        except ValueError as e:
+            invalid.setdefault(i, f"Fila {first_row + i}: Error en formato numérico - {e}")
+    return times
+
+
+def _chord_codes(chords, strip):
+    """Códigos por fila y nombres de las categorías del parser (sin repetir)"""
+    categories = chords.cat.categories
+    if strip:
+        categories = categories.str.strip()
+    table = {}
+    remap = np.fromiter(
+        (table.setdefault(label, len(table)) for label in categories),
+        dtype=np.int32,
+        count=len(categories)
+    )
+    return remap[chords.cat.codes.to_numpy()], list(table)
+
+
+def _validate_chunk(chunk, first_row, validate):
+    """Analizar un bloque del CSV: (códigos, nombres, inicios, fines, errores)
+
+    Con ``validate`` las filas inválidas ya vienen descartadas.
+    """
+    invalid = {}
+    starts = _parse_times(chunk['start'], first_row, invalid)
+    ends = _parse_times(chunk['end'], first_row, invalid)
+    codes, labels = _chord_codes(chunk['chord'], strip=validate)
+    if not validate:
+        if invalid:
+            raise ChordDataError(invalid[min(invalid)])
+        return codes, labels, starts, ends, []
+
+    empty = np.array([label == '' for label in labels], dtype=bool)
+    checks = [
+        (empty[codes], "Acorde vacío"),
+        ((starts < 0) | (ends < 0), "Tiempos negativos no permitidos"),
+        (starts >= ends, "Tiempo de inicio debe ser menor que tiempo de fin"),
+    ]
+    for mask, message in checks:
+        for i in np.flatnonzero(mask).tolist():
+            invalid.setdefault(i, f"Fila {first_row + i}: {message}")
+
+    if invalid:
+        valid = np.ones(len(chunk), dtype=bool)
+        valid[list(invalid)] = False
+        codes, starts, ends = codes[valid], starts[valid], ends[valid]
+    return codes, labels, starts, ends, [invalid[i] for i in sorted(invalid)]
+
+
+def iter_chord_csv(source, chunksize=CHUNK_ROWS, validate=True):
+    """Leer un CSV ``chord,start,end`` por bloques
+
+    ``source`` es una ruta o un archivo abierto (texto o binario UTF-8).
+    Produce tuplas (ChordTimeline del bloque, errores del bloque); los
+    errores usan el mismo texto "Fila N: ..." que el lector fila a fila.
+
+    Con ``validate=True`` las filas inválidas se omiten y se informan; con
+    ``validate=False`` se conservan todas y un número mal escrito lanza
+    ChordDataError, igual que un archivo vacío, sin las columnas necesarias
+    o que no está en UTF-8.
+    """
+    import pandas as pd  # Solo al leer CSV: la caché .ctl y la CLI no lo necesitan
+
+    position = source.tell() if hasattr(source, 'seek') else None
+    try:
+        header = pd.read_csv(source, nrows=0, encoding='utf-8').columns
+    except pd.errors.EmptyDataError:
+        raise ChordDataError("El archivo está vacío") from None
+    except UnicodeDecodeError:
+        raise ChordDataError(ENCODING_ERROR) from None
+    _rewind(source, position)
+
+    if not set(REQUIRED_COLUMNS).issubset(header):
+        raise ChordDataError(
+            f"El archivo debe tener las columnas: {', '.join(REQUIRED_COLUMNS)}\n"
+            f"Columnas encontradas: {', '.join(header) if len(header) else 'Ninguna'}"
+        )
+
+    reader = pd.read_csv(
+        source,
+        usecols=list(REQUIRED_COLUMNS),
+        dtype={'chord': 'category'},
+        na_filter=False,
+        float_precision='round_trip',
+        encoding='utf-8',
+        chunksize=chunksize,
+    )
+    first_row = 2  # La fila 1 es la cabecera
+    with reader:
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except UnicodeDecodeError:
+                raise ChordDataError(ENCODING_ERROR) from None
+            except pd.errors.ParserError as e:
+                raise ChordDataError(f"Error al procesar el archivo: {e}") from None
+            codes, labels, starts, ends, errors = _validate_chunk(chunk, first_row, validate)
+            first_row += len(chunk)
+            # Nombres en orden de aparición, como ChordTimeline.from_columns
+            codes, used = pd.factorize(codes, sort=False)
+            yield ChordTimeline([labels[i] for i in used], codes, starts, ends), errors
+
+
+def read_chord_csv(source, chunksize=CHUNK_ROWS, validate=True):
+    """Leer un CSV ``chord,start,end`` completo en bloque: (timeline, errores)
+
+    Los bloques se unen con una sola tabla de nombres, así que solo los
+    arrays del resultado (unos 20 bytes por acorde) tienen que caber en
+    memoria, no el texto del archivo.
+    """
+    table = {}
+    codes, starts, ends, errors = [], [], [], []
+    for part, part_errors in iter_chord_csv(source, chunksize, validate):
+        remap = np.fromiter(
+            (table.setdefault(label, len(table)) for label in part.labels),
+            dtype=np.int32,
+            count=len(part.labels)
+        )
+        codes.append(remap[part.codes])
+        starts.append(part.start)
+        ends.append(part.end)
+        errors.extend(part_errors)
+
+    if not codes:
+        return ChordTimeline([], [], [], []), errors
+    return ChordTimeline(list(table), np.concatenate(codes), np.concatenate(starts), np.concatenate(ends)), errors
@@ -0,0 +1,329 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from .cache import midi_cache, song_cache
+from .chords import CHORD_TONES, note_name
+from .errors import ChordDataError
+from .profiling import timed
+from .timeline import ChordTimeline
+
+# Tempo por defecto de un MIDI sin eventos de tempo (120 BPM)
+DEFAULT_TEMPO_US = 500_000
+
+# Tipos de acorde que se buscan por defecto (los que exportan los CSV de fadr)
+MIDI_QUALITIES = ('maj', 'min')
+
+# Duración en segundos de cada ventana de análisis
+DEFAULT_WINDOW = 0.25
+
+# Notas por debajo de esta (E3) cuentan como bajo al elegir la fundamental
+BASS_MAX_PITCH = 52
+
+MidiNote = namedtuple('MidiNote', ['start', 'end', 'pitch', 'velocity', 'channel', 'track'])
+MidiNote.__doc__ = """Nota de un MIDI. ``start`` y ``end`` están en ticks."""
+
+MidiNotes = namedtuple('MidiNotes', ['start', 'end', 'pitch', 'velocity'])
+MidiNotes.__doc__ = """Notas de uno o varios MIDI en columnas (tiempos en segundos)."""
+
+
+def _read_varlen(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def _iter_chunks(data):
+    """(tipo, inicio, fin) de cada chunk del archivo"""
+    pos = 0
+    while pos + 8 <= len(data):
+        kind, length = struct.unpack_from('>4sI', data, pos)
+        yield kind, pos + 8, min(pos + 8 + length, len(data))
+        pos += 8 + length
+
+
+def iter_midi_events(data):
+    """Recorrer los eventos de un Standard MIDI File (bytes) sin cargarlos en memoria
+
+    Produce (pista, tick, status, dato1, dato2) para mensajes de canal y
+    (pista, tick, 0xFF, tipo, payload) para meta-eventos. Los SysEx se
+    saltan. Cada byte del archivo se lee una sola vez.
+    """
+    for track, (kind, pos, end) in enumerate(c for c in _iter_chunks(data) if c[0] == b'MTrk'):
+        tick = 0
+        status = 0
+        while pos < end:
+            delta, pos = _read_varlen(data, pos)
+            tick += delta
+            byte = data[pos]
+            if byte == 0xFF:
+                meta_type = data[pos + 1]
+                length, pos = _read_varlen(data, pos + 2)
+                yield track, tick, 0xFF, meta_type, data[pos:pos + length]
+                pos += length
+                if meta_type == 0x2F:
+                    break  # Fin de pista
+            elif byte in (0xF0, 0xF7):
+                length, pos = _read_varlen(data, pos + 1)
+                pos += length
+            else:
+                if byte & 0x80:
+                    status = byte
+                    pos += 1
+                # Program change y channel pressure llevan un solo byte de datos
+                if status & 0xF0 in (0xC0, 0xD0):
+                    yield track, tick, status, data[pos], 0
+                    pos += 1
+                else:
+                    yield track, tick, status, data[pos], data[pos + 1]
+                    pos += 2
+
+
+def iter_midi_notes(data, tempo_changes=None):
+    """Emparejar note-on/note-off y producir cada nota (MidiNote) al cerrarse
+
+    Las notas que siguen sonando al terminar la pista se cierran en el
+    último tick de esa pista. Con ``tempo_changes`` (dict) se guardan
+    además en él los cambios de tempo ({tick: microsegundos por beat}) en la
+    misma pasada, sin recorrer los eventos otra vez (ver midi_tempo_map).
+    """
+    sounding = {}
+    last_tick = {}
+    for track, tick, status, data1, data2 in iter_midi_events(data):
+        last_tick[track] = tick
+        if status == 0xFF:
+            if tempo_changes is not None and data1 == 0x51 and len(data2) == 3:
+                tempo_changes[tick] = int.from_bytes(data2, 'big')
+            continue
+        kind = status & 0xF0
+        if kind not in (0x80, 0x90):
+            continue
+        key = (track, status & 0x0F, data1)
+        if kind == 0x90 and data2 > 0:
+            sounding.setdefault(key, []).append((tick, data2))
+        elif sounding.get(key):
+            start, velocity = sounding[key].pop(0)
+            yield MidiNote(start, tick, data1, velocity, key[1], track)
+    for (track, channel, pitch), pending in sounding.items():
+        for start, velocity in pending:
+            yield MidiNote(start, last_tick[track], pitch, velocity, channel, track)
+
+
+def midi_tempo_map(data, tempo_changes=None):
+    """(ticks por beat, ticks de cada cambio, segundos en ese tick, segundos por tick)
+
+    ``tempo_changes`` son los cambios de tempo ya recogidos por
+    iter_midi_notes; sin ellos se recorren los eventos para buscarlos.
+    """
+    division = struct.unpack_from('>H', data, 12)[0]
+    if division & 0x8000:
+        # SMPTE: -fps * ticks por frame, tiempo absoluto sin tempo
+        fps = 256 - (division >> 8)
+        seconds_per_tick = 1.0 / (fps * (division & 0xFF))
+        return None, np.zeros(1), np.zeros(1), np.array([seconds_per_tick])
+
+    changes = {0: DEFAULT_TEMPO_US}
+    if tempo_changes is None:
+        for _, tick, status, meta_type, payload in iter_midi_events(data):
+            if status == 0xFF and meta_type == 0x51 and len(payload) == 3:
+                changes[tick] = int.from_bytes(payload, 'big')
+    else:
+        changes.update(tempo_changes)
+    ticks = np.array(sorted(changes), dtype=np.float64)
+    seconds_per_tick = np.array([changes[t] for t in sorted(changes)], dtype=np.float64) / 1e6 / division
+    seconds = np.concatenate([[0.0], np.cumsum(np.diff(ticks) * seconds_per_tick[:-1])])
+    return division, ticks, seconds, seconds_per_tick
+
+
+def ticks_to_seconds(ticks, tempo_map):
+    """Convertir ticks a segundos con el mapa de tempo (vectorizado)"""
+    _, change_ticks, change_seconds, seconds_per_tick = tempo_map
+    ticks = np.asarray(ticks, dtype=np.float64)
+    i = np.searchsorted(change_ticks, ticks, side='right') - 1
+    return change_seconds[i] + (ticks - change_ticks[i]) * seconds_per_tick[i]
+
+
+def _file_error(path, error):
+    if isinstance(error, FileNotFoundError):
+        return ChordDataError(f"Archivo {path} no encontrado")
+    return ChordDataError(f"No se pudo leer {path}: {error.strerror or error}")
+
+
+def _file_key(path):
+    try:
+        file_stat = os.stat(path)
+    except OSError as e:
+        raise _file_error(path, e) from None
+    return os.path.abspath(path), file_stat.st_mtime_ns, file_stat.st_size
+
+
+def read_midi_file(path):
+    """Notas de un MIDI en columnas (MidiNotes), guardadas en midi_cache por archivo
+
+    El archivo se recorre mapeado en memoria (el sistema lo va leyendo por
+    páginas, sin copiarlo entero) y en una sola pasada: notas y cambios de
+    tempo a la vez. Lanza ChordDataError si no existe, no se puede leer o
+    no es un MIDI válido.
+    """
+    key = _file_key(path)
+    notes = midi_cache.get(key)
+    if notes is not None:
+        return notes
+
+    _, _, size = key
+    if size < 4:
+        raise ChordDataError(f"{path} no es un archivo MIDI")  # mmap no admite archivos vacíos
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                notes = _read_midi_data(path, data)
+    except OSError as e:
+        raise _file_error(path, e) from None
+    midi_cache.put(key, notes)
+    return notes
+
+
+def _read_midi_data(path, data):
+    """MidiNotes de los bytes (o el mmap) de un MIDI"""
+    if data[:4] != b'MThd':
+        raise ChordDataError(f"{path} no es un archivo MIDI")
+    starts, ends, pitches, velocities = [], [], [], []
+    tempo_changes = {}
+    try:
+        for note in iter_midi_notes(data, tempo_changes):
+            starts.append(note.start)
+            ends.append(note.end)
+            pitches.append(note.pitch)
+            velocities.append(note.velocity)
+        tempo_map = midi_tempo_map(data, tempo_changes)
+    except (IndexError, struct.error):
+        raise ChordDataError(f"{path} está dañado o incompleto") from None
+    notes = MidiNotes(
+        ticks_to_seconds(starts, tempo_map),
+        ticks_to_seconds(ends, tempo_map),
+        np.array(pitches, dtype=np.int16),
+        np.array(velocities, dtype=np.float64),
+    )
+    return notes
+
+
+def read_midi_notes(paths):
+    """Unir las notas de uno o varios MIDI (p. ej. las pistas separadas)"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    parts = [read_midi_file(path) for path in paths]
+    return MidiNotes(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def _sounding_time(starts, ends, weights, times):
+    """Tiempo sonado (ponderado) acumulado hasta cada instante de ``times``
+
+    sum(w * clip(t - start, 0, end - start)) para todas las notas, con sumas
+    prefijas sobre inicios y fines ordenados.
+    """
+    result = np.zeros(len(times))
+    for edges, sign in ((starts, 1.0), (ends, -1.0)):
+        order = np.argsort(edges, kind='stable')
+        edges, w = edges[order], weights[order]
+        cum_w = np.concatenate([[0.0], np.cumsum(w)])
+        cum_wt = np.concatenate([[0.0], np.cumsum(w * edges)])
+        k = np.searchsorted(edges, times, side='left')
+        result += sign * (times * cum_w[k] - cum_wt[k])
+    return result
+
+
+def chroma_windows(notes, window=DEFAULT_WINDOW, bass=False):
+    """Matriz (ventanas x 12) con el tiempo sonado de cada clase de altura
+
+    Con ``bass=True`` solo cuentan las notas graves (< BASS_MAX_PITCH).
+    Coste O((notas + ventanas) log notas), sin recorrer ventana por nota.
+    """
+    duration = float(notes.end.max()) if len(notes.end) else 0.0
+    n_windows = int(np.ceil(duration / window))
+    edges = np.arange(n_windows + 1) * window
+    chroma = np.zeros((n_windows, 12))
+    mask = notes.pitch < BASS_MAX_PITCH if bass else np.ones(len(notes.pitch), dtype=bool)
+    pitch_classes = notes.pitch % 12
+    for pc in range(12):
+        selected = mask & (pitch_classes == pc)
+        if selected.any():
+            sounding = _sounding_time(notes.start[selected], notes.end[selected],
+                                      notes.velocity[selected] / 127.0, edges)
+            chroma[:, pc] = np.diff(sounding)
+    return chroma
+
+
+def chord_templates(qualities=MIDI_QUALITIES):
+    """(etiquetas Harte, raíces, matriz de plantillas normalizadas) de cada acorde"""
+    labels, roots, templates = [], [], []
+    for quality in qualities:
+        for root in range(12):
+            template = np.zeros(12)
+            template[[(root + i) % 12 for i in CHORD_TONES[quality]]] = 1.0
+            labels.append(f"{note_name(root)}:{quality}")
+            roots.append(root)
+            templates.append(template / np.linalg.norm(template))
+    return labels, np.array(roots), np.array(templates)
+
+
+def midi_chord_timeline(notes, window=DEFAULT_WINDOW, qualities=MIDI_QUALITIES, bass_weight=0.25, min_energy=0.05):
+    """Derivar segmentos de acorde de las notas por coincidencia de clases de altura
+
+    Cada ventana de ``window`` segundos se compara (coseno) con las
+    plantillas de ``qualities``; la nota más grave suma ``bass_weight`` a los
+    acordes con esa fundamental. Las ventanas casi en silencio (energía
+    menor que ``min_energy`` veces la mediana) no tienen acorde. Las ventanas
+    consecutivas con el mismo acorde se unen en un segmento.
+    """
+    chroma = chroma_windows(notes, window)
+    if not len(chroma):
+        return ChordTimeline([], [], [], [])
+    bass = chroma_windows(notes, window, bass=True)[:len(chroma)]
+
+    labels, roots, templates = chord_templates(qualities)
+    energy = np.linalg.norm(chroma, axis=1)
+    scores = (chroma / np.maximum(energy, 1e-12)[:, None]) @ templates.T
+    bass_energy = bass.sum(axis=1)
+    bass_share = bass / np.maximum(bass_energy, 1e-12)[:, None]
+    scores += bass_weight * bass_share[:, roots]
+
+    best = np.argmax(scores, axis=1)
+    active = energy > min_energy * np.median(energy[energy > 0]) if (energy > 0).any() else energy > 0
+    best[~active] = -1
+
+    # Unir ventanas consecutivas con el mismo acorde
+    boundaries = np.flatnonzero(np.diff(best)) + 1
+    seg_start = np.concatenate([[0], boundaries])
+    seg_end = np.concatenate([boundaries, [len(best)]])
+    keep = best[seg_start] >= 0
+    seg_start, seg_end = seg_start[keep], seg_end[keep]
+    return ChordTimeline.from_columns(
+        [labels[i] for i in best[seg_start].tolist()],
+        np.round(seg_start * window, 6),
+        np.round(seg_end * window, 6)
+    )
+
+
+@timed('load.midi')
+def load_midi_chords(paths, window=DEFAULT_WINDOW, qualities=MIDI_QUALITIES):
+    """Acordes de uno o varios MIDI, guardados en song_cache
+
+    Las notas de cada archivo se guardan aparte en midi_cache; las claves
+    incluyen ruta, mtime y tamaño, así que editar un MIDI invalida sus
+    entradas.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    key = ('midi', tuple(_file_key(path) for path in paths), window, tuple(qualities))
+    cached = song_cache.get(key)
+    if cached is None:
+        cached = (midi_chord_timeline(read_midi_notes(paths), window, qualities), [])
+        song_cache.put(key, cached)
+    return cached[0]
@@ -0,0 +1,263 @@
+from .cache import pdf_cache
+from .chart import iter_chart_lines, iter_chart_rows
+from .profiling import timed
+from .timeline import ChordTimeline
+
+# Geometría de la página (mm, A4 vertical)
+PAGE_MARGIN = 15
+SYSTEM_HEIGHT = 20
+TITLE_HEIGHT = 16
+FOOTER_HEIGHT = 8
+
+# Posiciones dentro de un sistema, medidas desde su borde superior
+MEASURE_NUMBER_Y = 3
+CHORD_Y = 8.5
+STAFF_TOP = 10.5
+STAFF_BOTTOM = 16
+
+CHORD_FONT = ('Helvetica', 'B', 11)
+MEASURE_FONT = ('Helvetica', '', 7)
+TITLE_FONT = ('Helvetica', 'B', 16)
+
+# Tamaños mínimos (pt) al reducir un texto que no cabe; por debajo se recorta
+MIN_CHORD_SIZE = 7
+MIN_TITLE_SIZE = 10
+
+
+@timed('pdf.generate_text')
+def generate_pdf(chart_text, title="Chord Chart"):
+    """Generar PDF del chart
+
+    ``chart_text`` puede ser el texto completo o un iterable de sistemas
+    (por ejemplo iter_chord_chart), que se consume de forma perezosa.
+    """
+    from fpdf import FPDF  # Importación diferida: fpdf solo hace falta al exportar
+    
+    try:
+        pdf = FPDF()
+        pdf.add_page()
+        
+        # Título
+        pdf.set_font("Arial", 'B', 16)
+        # Limpiar título de caracteres problemáticos
+        clean_title = title.encode('latin-1', errors='replace').decode('latin-1')
+        pdf.cell(0, 10, clean_title, ln=True, align='C')
+        pdf.ln(5)
+        
+        # Chart
+        pdf.set_font("Courier", size=9)  # Reducir tamaño para mejor ajuste
+        
+        for line in iter_chart_lines(chart_text):
+            # Limpiar línea de caracteres problemáticos
+            clean_line = line.encode('latin-1', errors='replace').decode('latin-1')
+            # Truncar líneas muy largas
+            if len(clean_line) > 100:
+                clean_line = clean_line[:100] + "..."
+            
+            try:
+                pdf.cell(0, 4, clean_line, ln=True)
+            except:
+                # Si falla, usar una línea simplificada
+                pdf.cell(0, 4, line[:50] + "...", ln=True)
+        
+        return pdf
+    except Exception as e:
+        # Crear PDF básico en caso de error
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        pdf.cell(0, 10, "Error al generar chart", ln=True, align='C')
+        pdf.cell(0, 10, f"Error: {str(e)}", ln=True, align='C')
+        return pdf
+
+
+def latin1(text):
+    """Texto representable con las fuentes base del PDF (latin-1)"""
+    return text.encode('latin-1', errors='replace').decode('latin-1')
+
+
+class _ChartPage:
+    """Estado de maquetación del chart vectorial: página actual, posición
+    vertical y anchos de texto ya medidos (los nombres de acorde se repiten)."""
+
+    def __init__(self, pdf, title):
+        self.pdf = pdf
+        self.title = title
+        self.widths = {}
+        self.font = None
+        self.y = 0
+        self.pages = 0
+
+    def use_font(self, font):
+        if font != self.font:
+            self.pdf.set_font(*font)
+            self.font = font
+
+    def text_width(self, text):
+        key = (self.font, text)
+        width = self.widths.get(key)
+        if width is None:
+            width = self.widths[key] = self.pdf.get_string_width(text)
+        return width
+
+    def fit_text(self, text, width, font, min_size):
+        """(texto, fuente) que caben en ``width`` mm
+
+        Primero se reduce el tamaño de ``font`` hasta ``min_size``; si aun
+        así no cabe, se recorta el texto terminándolo en '.' (como mínimo
+        queda su primer carácter).
+        """
+        family, style, size = font
+        for size in range(size, min_size - 1, -1):
+            self.use_font((family, style, size))
+            if self.text_width(text) <= width:
+                return text, self.font
+        for n in range(len(text) - 1, 0, -1):
+            if self.text_width(text[:n] + '.') <= width:
+                return text[:n] + '.', self.font
+        return text[:1], self.font
+
+    def new_page(self):
+        pdf = self.pdf
+        pdf.add_page()
+        self.pages += 1
+        self.y = PAGE_MARGIN
+        if self.pages == 1:
+            title, font = self.fit_text(self.title, pdf.w - 2 * PAGE_MARGIN, TITLE_FONT, MIN_TITLE_SIZE)
+            self.use_font(font)
+            pdf.text(PAGE_MARGIN, self.y + 8, title)
+            self.y += TITLE_HEIGHT
+        # Número de página al pie
+        self.use_font(MEASURE_FONT)
+        label = str(self.pages)
+        pdf.text(pdf.w - PAGE_MARGIN - self.text_width(label), pdf.h - PAGE_MARGIN / 2, label)
+
+    def reserve_system(self):
+        """Devolver la coordenada superior del siguiente sistema, paginando si no cabe"""
+        if self.pages == 0 or self.y + SYSTEM_HEIGHT > self.pdf.h - PAGE_MARGIN - FOOTER_HEIGHT:
+            self.new_page()
+        top = self.y
+        self.y += SYSTEM_HEIGHT
+        return top
+
+
+def _place_chords(page, targets, labels, left, right):
+    """(x, texto, fuente) de cada acorde de un sistema
+
+    Cada acorde va en su beat (``targets``, en mm) o, si no cabe, lo justo a
+    la derecha del anterior. Los que se salen por la derecha se adelantan
+    empujando a los anteriores hacia la izquierda, y si la línea no da para
+    todos a tamaño normal, los que no caben en su hueco se reducen o se
+    recortan (fit_text).
+    """
+    page.use_font(CHORD_FONT)
+    widths = [page.text_width(label) for label in labels]
+    xs = []
+    end = left
+    for target, width in zip(targets, widths):
+        xs.append(max(target, end + 1))
+        end = xs[-1] + width
+    if end > right:
+        limit = right
+        for i in range(len(xs) - 1, -1, -1):
+            xs[i] = max(min(xs[i], limit - widths[i]), left)
+            limit = xs[i] - 1
+
+    placed = []
+    end = left
+    for i, (x, label, width) in enumerate(zip(xs, labels, widths)):
+        x = max(x, end + 1) if i else x
+        space = (xs[i + 1] - 1 if i + 1 < len(xs) else right) - x
+        font = CHORD_FONT
+        if width > space + 0.01:
+            label, font = page.fit_text(label, space, CHORD_FONT, MIN_CHORD_SIZE)
+            page.use_font(font)
+            width = page.text_width(label)
+        placed.append((x, label, font))
+        end = x + width
+    return placed
+
+
+@timed('pdf.generate')
+def generate_chart_pdf(chords, bpm, beats_per_measure, measures_per_line, title="Chord Chart", offset=0.0,
+                       tempo_map=None):
+    """Generar el PDF del chart dibujando compases y acordes desde la línea de tiempo
+
+    A diferencia de generate_pdf no pasa por el chart de texto: cada sistema
+    ocupa el ancho útil de la página (nunca se trunca), las barras y marcas de
+    beat son líneas vectoriales y los acordes se colocan en su beat exacto.
+    Las páginas se añaden cuando un sistema no cabe.
+    """
+    from fpdf import FPDF  # Importación diferida: fpdf solo hace falta al exportar
+    
+    pdf = FPDF(unit='mm', format='A4')
+    pdf.set_auto_page_break(False)
+    pdf.set_line_width(0.2)
+    page = _ChartPage(pdf, latin1(title))
+    if not chords:
+        page.new_page()
+        page.use_font(CHORD_FONT)
+        pdf.text(PAGE_MARGIN, page.y + CHORD_Y, "No hay datos de acordes disponibles")
+        return pdf
+    
+    timeline = ChordTimeline.coerce(chords)
+    left = PAGE_MARGIN
+    right = pdf.w - PAGE_MARGIN
+    beat_width = (right - left) / (measures_per_line * beats_per_measure)
+    
+    for row in iter_chart_rows(timeline, bpm, beats_per_measure, measures_per_line, offset, tempo_map):
+        top = page.reserve_system()
+        n_measures = row.end_measure - row.start_measure
+        line_right = left + n_measures * beats_per_measure * beat_width
+        
+        # Barras de compás, marcas de beat y números de compás
+        pdf.line(left, top + STAFF_BOTTOM, line_right, top + STAFF_BOTTOM)
+        page.use_font(MEASURE_FONT)
+        for m in range(n_measures + 1):
+            x = left + m * beats_per_measure * beat_width
+            pdf.line(x, top + STAFF_TOP, x, top + STAFF_BOTTOM)
+            if m == n_measures:
+                break
+            pdf.text(x + 0.8, top + MEASURE_NUMBER_Y, str(row.start_measure + m + 1))
+            for beat in range(1, beats_per_measure):
+                xb = x + beat * beat_width
+                pdf.line(xb - 0.8, top + STAFF_BOTTOM - 1.2, xb + 0.8, top + STAFF_TOP + 1.2)
+        
+        # Acordes en su beat, sin solaparse ni salirse de la línea
+        targets = [left + beat * beat_width + 0.8 for beat in row.beats.tolist()]
+        for x, label, font in _place_chords(page, targets, [latin1(label) for label in row.labels], left, right):
+            page.use_font(font)
+            pdf.text(x, top + CHORD_Y, label)
+    
+    return pdf
+
+
+def pdf_bytes(pdf):
+    """Contenido binario de un FPDF (fpdf2 devuelve bytearray; pyfpdf, str)"""
+    data = pdf.output()
+    if isinstance(data, str):
+        data = data.encode('latin-1', errors='replace')
+    return bytes(data)
+
+
+@timed('pdf.bytes')
+def chart_pdf_bytes(chords, bpm, beats_per_measure, measures_per_line, title="Chord Chart", offset=0.0,
+                    tempo_map=None):
+    """Bytes del PDF vectorial del chart, guardados en pdf_cache
+
+    La clave es el hash de la canción, los parámetros de layout (con
+    ``offset`` y el hash de ``tempo_map``) y el título: volver a pedir el
+    mismo PDF no lo genera otra vez.
+    """
+    timeline = ChordTimeline.coerce(chords) if chords else None
+    key = (
+        timeline.digest() if timeline else None, bpm, beats_per_measure, measures_per_line, title, offset,
+        tempo_map.digest() if tempo_map is not None else None
+    )
+    data = pdf_cache.get(key)
+    if data is None:
+        data = pdf_bytes(generate_chart_pdf(
+            timeline or [], bpm, beats_per_measure, measures_per_line, title, offset, tempo_map
+        ))
+        pdf_cache.put(key, data)
+    return data
@@ -0,0 +1,286 @@
+"""Medición por etapas de las rutas críticas (carga, chart, PDF, audio)
+
+Desactivada por defecto: cada función instrumentada con ``timed`` solo
+comprueba un atributo antes de llamar a la original. Al activarla se
+acumulan por etapa las llamadas y el tiempo de pared; con
+``trace_memory`` también el pico y el neto de memoria asignada
+(tracemalloc), y con ``profile`` un perfil de cProfile de todo lo
+ejecutado mientras está activa.
+
+Variables de entorno (para la CLI y procesos por lotes):
+``CHORDCHART_PROFILE=1`` activa la medición, ``=memory`` además
+tracemalloc y ``=cprofile`` además cProfile; ``CHORDCHART_PROFILE_JSON``
+es la ruta donde la CLI vuelca las medidas al terminar.
+"""
+import functools
+import io
+import json
+import os
+import threading
+import time
+
+# Variables de entorno que activan la medición
+PROFILE_ENV = 'CHORDCHART_PROFILE'
+PROFILE_JSON_ENV = 'CHORDCHART_PROFILE_JSON'
+
+# Versión del formato de to_dict / to_json
+REPORT_VERSION = 1
+
+
+def _empty_stage():
+    return {
+        'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'last_seconds': 0.0,
+        'peak_bytes': 0, 'net_bytes': 0,
+    }
+
+
+class _Frame:
+    __slots__ = ('name', 'start', 'memory_start', 'memory_peak')
+
+    def __init__(self, name, start, memory_start):
+        self.name = name
+        self.start = start
+        self.memory_start = memory_start
+        self.memory_peak = 0
+
+
+class Instrumentation:
+    """Contadores por etapa (llamadas, segundos, memoria) y perfil opcional.
+
+    Las etapas pueden anidarse; el tiempo de cada una incluye el de sus
+    etapas internas. Con ``trace_memory`` el pico de una etapa también
+    cuenta las asignaciones de sus etapas internas.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.profile = False
+        self.stages = {}
+        self._profiler = None
+        self._profile_thread = None
+        self._started_tracemalloc = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=False, trace_memory=False, profile=False):
+        """Activar o desactivar la medición, tracemalloc y cProfile"""
+        self.enabled = enabled
+        self._set_trace_memory(enabled and trace_memory)
+        self._set_profile(enabled and profile)
+
+    def configure_from_env(self, environ=os.environ):
+        """Configurar desde CHORDCHART_PROFILE (1, memory o cprofile)"""
+        mode = environ.get(PROFILE_ENV, '').strip().lower()
+        if mode in ('', '0', 'false', 'no'):
+            return
+        self.configure(enabled=True, trace_memory=mode == 'memory', profile=mode == 'cprofile')
+
+    def _set_trace_memory(self, trace_memory):
+        import tracemalloc
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        elif not trace_memory and self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.trace_memory = trace_memory
+
+    def _set_profile(self, profile):
+        """Activar o parar cProfile; ``self.profile`` dice si está capturando
+
+        cProfile solo mide el hilo que lo activa y Streamlit ejecuta cada
+        rerun en un hilo nuevo, así que al configurar desde otro hilo se
+        vuelve a activar en el actual. El perfil acumulado se conserva.
+        """
+        current = threading.get_ident()
+        if profile:
+            if self._profiler is None:
+                import cProfile
+
+                self._profiler = cProfile.Profile()
+            if not self.profile or self._profile_thread != current:
+                if self.profile:
+                    self._profiler.disable()
+                try:
+                    self._profiler.enable()
+                    self._profile_thread = current
+                except ValueError:
+                    # Otro perfilador ya está activo en el proceso
+                    profile = False
+        elif self.profile:
+            self._profiler.disable()
+        self.profile = profile
+
+    def reset(self):
+        """Borrar los contadores y el perfil acumulado"""
+        with self._lock:
+            self.stages = {}
+        if self._profiler is not None:
+            profile = self.profile
+            self._set_profile(False)
+            self._profiler = None
+            self._set_profile(profile)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name):
+        memory_start = 0
+        if self.trace_memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            stack = self._stack()
+            if stack:
+                # El pico que vio la etapa externa hasta ahora se perdería al reiniciarlo
+                parent = stack[-1]
+                parent.memory_peak = max(parent.memory_peak, peak - parent.memory_start)
+            tracemalloc.reset_peak()
+            memory_start = current
+        self._stack().append(_Frame(name, time.perf_counter(), memory_start))
+
+    def _exit(self):
+        end = time.perf_counter()
+        frame = self._stack().pop()
+        elapsed = end - frame.start
+        memory_peak = memory_net = 0
+        if self.trace_memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            memory_peak = max(frame.memory_peak, peak - frame.memory_start)
+            memory_net = current - frame.memory_start
+            stack = self._stack()
+            if stack:
+                parent = stack[-1]
+                parent.memory_peak = max(parent.memory_peak, peak - parent.memory_start)
+        with self._lock:
+            stage = self.stages.get(frame.name)
+            if stage is None:
+                stage = self.stages[frame.name] = _empty_stage()
+            stage['calls'] += 1
+            stage['seconds'] += elapsed
+            stage['max_seconds'] = max(stage['max_seconds'], elapsed)
+            stage['last_seconds'] = elapsed
+            stage['peak_bytes'] = max(stage['peak_bytes'], memory_peak)
+            stage['net_bytes'] += memory_net
+
+    def stage(self, name):
+        """Context manager que mide una etapa (no hace nada si está desactivada)"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def profile_text(self, limit=30, sort='cumulative'):
+        """Resumen de cProfile (las ``limit`` funciones más costosas), o None"""
+        if self._profiler is None:
+            return None
+        import pstats
+
+        # pstats necesita el perfil parado; solo se reanuda si seguía activo
+        if self.profile:
+            self._profiler.disable()
+        try:
+            output = io.StringIO()
+            pstats.Stats(self._profiler, stream=output).sort_stats(sort).print_stats(limit)
+        finally:
+            if self.profile:
+                self._profiler.enable()
+                self._profile_thread = threading.get_ident()
+        return output.getvalue()
+
+    def to_dict(self, clear=False):
+        """Medidas por etapa, listas para JSON; con ``clear`` se ponen a cero"""
+        with self._lock:
+            stages = {name: dict(values) for name, values in self.stages.items()}
+            if clear:
+                self.stages = {}
+        return {
+            'version': REPORT_VERSION,
+            'time': time.time(),
+            'pid': os.getpid(),
+            'trace_memory': self.trace_memory,
+            'stages': stages,
+        }
+
+    def to_json(self, indent=1):
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+
+    def dump_json(self, path):
+        """Escribir las medidas en ``path`` como JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+
+class _Stage:
+    __slots__ = ('instrumentation', 'name')
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.instrumentation._enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation._exit()
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# Instancia del proceso; vive en el paquete, así que en Streamlit se comparte
+# entre ejecuciones y sesiones
+instrumentation = Instrumentation()
+instrumentation.configure_from_env()
+
+
+def timed(name):
+    """Decorador que mide cada llamada a la función como la etapa ``name``"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            with _Stage(instrumentation, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def merge_reports(reports):
+    """Sumar las medidas (to_dict) de varios procesos en un informe"""
+    stages = {}
+    for report in reports:
+        for name, values in report['stages'].items():
+            total = stages.setdefault(name, _empty_stage())
+            total['calls'] += values['calls']
+            total['seconds'] += values['seconds']
+            total['max_seconds'] = max(total['max_seconds'], values['max_seconds'])
+            total['last_seconds'] = values['last_seconds']
+            total['peak_bytes'] = max(total['peak_bytes'], values['peak_bytes'])
+            total['net_bytes'] += values['net_bytes']
+    return {
+        'version': REPORT_VERSION,
+        'time': time.time(),
+        'pid': os.getpid(),
+        'trace_memory': any(r.get('trace_memory') for r in reports),
+        'stages': stages,
+    }
+
@@ -0,0 +1,59 @@
+import hashlib
+import io
+import os
+
+from .cache import song_cache
+from .errors import ChordDataError
+from .loader import read_chord_csv
+from .profiling import timed
+from .timelinefile import load_csv_timeline
+
+
+@timed('load.csv_file')
+def load_chord_file(csv_path):
+    """Cargar un CSV de acordes local como ChordTimeline
+
+    El resultado se guarda en song_cache por (ruta, mtime, tamaño): volver a
+    abrir el archivo sin cambios no lo lee de nuevo. Entre reinicios se usa
+    el binario ``.ctl`` junto al CSV, mapeado en memoria. Lanza
+    ChordDataError si el archivo no existe o no se puede leer.
+    """
+    try:
+        file_stat = os.stat(csv_path)
+    except FileNotFoundError:
+        raise ChordDataError(f"Archivo {csv_path} no encontrado") from None
+
+    key = ('file', os.path.abspath(csv_path), file_stat.st_mtime_ns, file_stat.st_size)
+    cached = song_cache.get(key)
+    if cached is not None:
+        return cached[0]
+
+    try:
+        timeline = load_csv_timeline(csv_path)
+    except FileNotFoundError:
+        raise ChordDataError(f"Archivo {csv_path} no encontrado") from None
+    except ChordDataError as e:
+        raise ChordDataError(f"Error al procesar el archivo: {e}") from None
+    song_cache.put(key, (timeline, []))
+    return timeline
+
+
+@timed('load.upload')
+def load_chord_upload(raw):
+    """Validar el contenido (bytes) de un CSV subido: (timeline, filas omitidas)
+
+    El resultado se guarda en song_cache por hash del contenido, así que el
+    mismo archivo no se decodifica ni valida otra vez. Lanza ChordDataError
+    si no se puede leer o no queda ninguna fila válida (con las filas
+    omitidas en ``diagnostics``).
+    """
+    key = ('upload', hashlib.blake2b(raw, digest_size=16).hexdigest())
+    cached = song_cache.get(key)
+    if cached is not None:
+        return cached
+
+    timeline, invalid_rows = read_chord_csv(io.BytesIO(raw))
+    if not len(timeline):
+        raise ChordDataError("No se pudo procesar ninguna fila válida del archivo", invalid_rows)
+    song_cache.put(key, (timeline, invalid_rows))
+    return timeline, invalid_rows
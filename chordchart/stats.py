@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .chords import simplify_chord
+from .profiling import timed
+from .timeline import ChordTimeline
+
+SongStats = namedtuple('SongStats', [
+    'duration', 'total_chords', 'labels', 'counts', 'total_time',
+    'first_chord', 'last_chord', 'harmonic_rhythm',
+])
+SongStats.__doc__ = """Estadísticas de una canción.
+
+``labels`` son los acordes simplificados distintos (en orden de aparición);
+``counts`` y ``total_time`` (segundos) son arrays alineados con ``labels``.
+``harmonic_rhythm`` es un diccionario con la duración media, mediana,
+mínima y máxima de los acordes, el número de cambios de acorde y los
+cambios por minuto.
+"""
+
+# Estadísticas ya calculadas, por hash de la canción
+stats_cache = LRUCache(maxsize=32)
+
+
+@timed('stats')
+def compute_song_stats(chords):
+    """Calcular todas las estadísticas de la canción en una pasada vectorizada"""
+    timeline = ChordTimeline.coerce(chords).map_labels(simplify_chord)
+    codes = timeline.codes
+    durations = timeline.end - timeline.start
+    duration = timeline.duration
+
+    counts = np.bincount(codes, minlength=len(timeline.labels))
+    total_time = np.bincount(codes, weights=durations, minlength=len(timeline.labels))
+
+    # Ritmo armónico: cambios entre acordes consecutivos en orden temporal
+    in_time = codes[np.argsort(timeline.start, kind='stable')]
+    changes = int(np.count_nonzero(in_time[1:] != in_time[:-1]))
+    harmonic_rhythm = {
+        'mean_duration': float(durations.mean()) if len(durations) else 0.0,
+        'median_duration': float(np.median(durations)) if len(durations) else 0.0,
+        'min_duration': float(durations.min()) if len(durations) else 0.0,
+        'max_duration': float(durations.max()) if len(durations) else 0.0,
+        'changes': changes,
+        'changes_per_minute': changes / (duration / 60.0) if duration > 0 else 0.0,
+    }
+
+    return SongStats(
+        duration=duration,
+        total_chords=len(timeline),
+        labels=timeline.labels,
+        counts=counts,
+        total_time=total_time,
+        first_chord=timeline.labels[codes[0]] if len(codes) else None,
+        last_chord=timeline.labels[codes[-1]] if len(codes) else None,
+        harmonic_rhythm=harmonic_rhythm,
+    )
+
+
+def song_stats(chords):
+    """Estadísticas de la canción, guardadas en caché por hash del contenido"""
+    timeline = ChordTimeline.coerce(chords)
+    stats = stats_cache.get(timeline.digest())
+    if stats is None:
+        stats = compute_song_stats(timeline)
+        stats_cache.put(timeline.digest(), stats)
+    return stats
+
+
+def top_chords(stats, n=5):
+    """Los ``n`` acordes más frecuentes como (acorde, veces, segundos)"""
+    order = np.argsort(-stats.counts, kind='stable')[:n]
+    return [(stats.labels[i], int(stats.counts[i]), float(stats.total_time[i])) for i in order]
@@ -0,0 +1,76 @@
+import numpy as np
+
+# Armónicos (múltiplo de la fundamental, amplitud) de cada instrumento; son
+# los mismos que suman generate_piano_harmonics y generate_tone con np.sin
+INSTRUMENT_HARMONICS = {
+    'piano': [(1, 1.0), (2, 0.4), (3, 0.15), (4, 0.08), (5, 0.04), (6, 0.02)],
+    'sine': [(1, 1.0)],
+    'organ': [(1, 1.0), (2, 0.5), (3, 0.3)],
+}
+
+# Muestras por ciclo de cada tabla (potencia de 2)
+TABLE_SIZE = 2048
+
+
+class Wavetable:
+    """Tablas de un ciclo, limitadas en banda, para un instrumento.
+
+    Se precalcula una tabla por cada cantidad de armónicos (la k-ésima suma
+    los k primeros). Al renderizar se elige la tabla con los armónicos que
+    caben por debajo de Nyquist, así las notas agudas no generan aliasing.
+    Cada tabla lleva una muestra extra (copia de la primera) para poder
+    interpolar sin calcular el índice módulo el tamaño.
+    """
+
+    def __init__(self, harmonics, size=TABLE_SIZE):
+        self.harmonics = list(harmonics)
+        self.size = size
+        phase = 2 * np.pi * np.arange(size + 1) / size
+        self.tables = []
+        table = np.zeros(size + 1)
+        for multiple, amp in self.harmonics:
+            table = table + amp * np.sin(multiple * phase)
+            self.tables.append(table)
+
+    def table_for(self, frequency, sample_rate):
+        """Tabla con todos los armónicos por debajo de la frecuencia de Nyquist"""
+        nyquist = sample_rate / 2.0
+        count = sum(1 for multiple, _ in self.harmonics if multiple * frequency < nyquist)
+        return self.tables[max(count, 1) - 1]
+
+    def render(self, frequency, t, sample_rate, amplitude=0.3):
+        """Renderizar la nota en los instantes ``t`` (segundos) por lectura de tabla"""
+        table = self.table_for(frequency, sample_rate)
+        # Acumulador de fase en ciclos -> posición fraccional en la tabla
+        position = np.asarray(t, dtype=np.float64) * frequency
+        position -= np.floor(position)
+        position *= self.size
+        index = position.astype(np.intp)
+        position -= index
+        # Interpolación lineal entre muestras vecinas
+        lower = table[index]
+        wave_data = table[index + 1]
+        wave_data -= lower
+        wave_data *= position
+        wave_data += lower
+        wave_data *= amplitude
+        return wave_data
+
+
+_wavetables = {}
+
+
+def get_wavetable(instrument):
+    """Wavetable del instrumento (se construye una sola vez por proceso)"""
+    wavetable = _wavetables.get(instrument)
+    if wavetable is None:
+        if instrument not in INSTRUMENT_HARMONICS:
+            raise ValueError(f"Instrumento desconocido: {instrument}")
+        wavetable = Wavetable(INSTRUMENT_HARMONICS[instrument])
+        _wavetables[instrument] = wavetable
+    return wavetable
+
+
+def render_wavetable(instrument, frequency, t, sample_rate, amplitude=0.3):
+    """Renderizar una nota de ``instrument`` con su wavetable"""
+    return get_wavetable(instrument).render(frequency, t, sample_rate, amplitude)
@@ -0,0 +1,248 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .cache import LRUCache
+from .profiling import timed
+from .timeline import ChordTimeline
+
+# Rango de tempos candidatos (el mismo que acepta la interfaz)
+MIN_BPM = 60.0
+MAX_BPM = 200.0
+
+# Tempo del chart cuando no se detecta uno claro
+DEFAULT_BPM = 120.0
+
+# Resolución de la búsqueda inicial de tempo
+BPM_STEP = 0.25
+
+# Resolución en segundos del histograma de intervalos entre inicios
+INTERVAL_BIN = 0.01
+
+# Cada inicio se compara con los siguientes N para el histograma
+INTERVAL_NEIGHBORS = 4
+
+# Tempo de referencia para desempatar entre múltiplos (doble/mitad)
+PRIOR_BPM = 120.0
+
+# Intervalo más largo (segundos) que entra en el histograma
+MAX_INTERVAL = 8.0
+
+# En compases binarios, un tempo cuyos 2/3 encajan casi igual de bien se
+# toma como tresillo del tempo real (ver estimate_tempo)
+TRIPLET_THRESHOLD = 0.9
+
+# Tempos a una octava (doble/mitad) cuya coherencia llega a esta fracción de
+# la del elegido se consideran empatados (ver _resolve_octave)
+OCTAVE_THRESHOLD = 0.9
+
+# Diferencia de distancia (en octavas) por debajo de la cual _resolve_octave
+# prefiere el tempo más rápido
+OCTAVE_TIE = 0.05
+
+# Por debajo de esta confianza la estimación no es mejor que el azar (con
+# inicios aleatorios la confianza esperada es 2 * ONSET_TOLERANCE)
+MIN_CONFIDENCE = 0.7
+
+# Un bpm a menos de esto del estimado se toma como el estimado (la interfaz
+# lo muestra redondeado a 2 decimales)
+BPM_MATCH_TOLERANCE = 0.01
+
+# Un inicio cuenta como "en el beat" si está a menos de esta fracción de beat
+ONSET_TOLERANCE = 0.25
+
+TempoEstimate = namedtuple('TempoEstimate', ['bpm', 'offset', 'confidence'])
+TempoEstimate.__doc__ = """Tempo estimado de una canción.
+
+``offset`` son los segundos en que empieza el compás 1 (un downbeat); es
+menor o igual que el primer acorde, así que puede ser negativo si la
+canción empieza con anacrusa. ``confidence`` (0 a 1) es la fracción de
+acordes cuyo inicio cae sobre un beat de la rejilla estimada.
+"""
+
+# Estimaciones ya calculadas, por (hash de la canción, beats por compás)
+tempo_cache = LRUCache(maxsize=32)
+
+
+def chord_onsets(chords):
+    """Inicios de acorde ordenados y sin repetir, con la duración de cada acorde"""
+    timeline = ChordTimeline.coerce(chords)
+    onsets, first = np.unique(timeline.start, return_index=True)
+    return onsets, (timeline.end - timeline.start)[first]
+
+
+def _interval_histogram(onsets, max_interval):
+    """Histograma (centros, pesos) de los intervalos entre cada inicio y los siguientes"""
+    n_bins = int(np.ceil(max_interval / INTERVAL_BIN))
+    weights = np.zeros(n_bins)
+    for k in range(1, INTERVAL_NEIGHBORS + 1):
+        intervals = onsets[k:] - onsets[:-k]
+        intervals = intervals[intervals < max_interval]
+        weights += np.bincount((intervals / INTERVAL_BIN).astype(np.int64), minlength=n_bins)[:n_bins]
+    return (np.arange(n_bins) + 0.5) * INTERVAL_BIN, weights
+
+
+def _grid_fit(onsets, period, phase):
+    """Ajustar periodo y fase por mínimos cuadrados a los inicios que caen en la rejilla
+
+    El ajuste empieza con los primeros 32 beats y duplica la ventana en cada
+    paso: así un periodo inicial algo impreciso no acumula error suficiente
+    para asignar un inicio al beat equivocado al final de la canción.
+    """
+    span = 32
+    while True:
+        selected = onsets[:np.searchsorted(onsets, onsets[0] + span * period)]
+        position = (selected - phase) / period
+        beat = np.round(position)
+        inliers = np.abs(position - beat) < ONSET_TOLERANCE
+        if np.count_nonzero(inliers) >= 2 and np.ptp(beat[inliers]) > 0:
+            period, phase = np.polyfit(beat[inliers], selected[inliers], 1)
+        if len(selected) == len(onsets):
+            return period, phase
+        span *= 2
+
+
+def _resolve_octave(bpm, candidates, onsets, beats_per_measure):
+    """Elegir entre un tempo y sus octavas igual de coherentes
+
+    Los inicios de acorde encajan igual con un tempo y con su doble si los
+    acordes cambian cada dos beats o más. Entre los ``candidates`` empatados
+    gana el más cercano (en octavas) a la vez a PRIOR_BPM y a que el
+    intervalo mediano entre acordes dure un compás, el ritmo armónico más
+    común; si la distancia difiere menos de OCTAVE_TIE, el más rápido.
+    """
+    median_interval = float(np.median(np.diff(onsets)))
+    candidates = np.array([bpm, *candidates])
+    beats = median_interval * candidates / 60.0
+    distance = np.abs(np.log2(beats / beats_per_measure)) + np.abs(np.log2(candidates / PRIOR_BPM))
+    return float(candidates[distance <= distance.min() + OCTAVE_TIE].max())
+
+
+def estimate_beat_grid(onsets, bpm):
+    """Fase (segundos de un beat cualquiera) de la rejilla de ``bpm`` que mejor encaja con los inicios"""
+    period = 60.0 / bpm
+    angle = np.angle(np.exp(2j * np.pi * onsets / period).sum())
+    return (angle / (2 * np.pi) * period) % period
+
+
+def estimate_downbeat(chords, bpm, beats_per_measure, phase=None):
+    """Segundos en que empieza el compás 1 para un tempo dado
+
+    El downbeat es el beat de la rejilla (de ``beats_per_measure`` posibles)
+    donde empiezan más segundos de acorde: los acordes largos suelen entrar
+    en el primer tiempo del compás. Los acordes que duran compases enteros
+    (también terminan en la rejilla, a un múltiplo de ``beats_per_measure``
+    beats del inicio) cuentan doble: confirman el downbeat en sus dos
+    extremos. Se devuelve el downbeat anterior o igual al primer acorde.
+    """
+    onsets, durations = chord_onsets(chords)
+    if not len(onsets):
+        return 0.0
+    period = 60.0 / bpm
+    if phase is None:
+        phase = estimate_beat_grid(onsets, bpm)
+    position = (onsets - phase) / period
+    beat = np.round(position).astype(np.int64)
+    on_grid = np.abs(position - beat) < ONSET_TOLERANCE
+    end_position = (onsets + durations - phase) / period
+    end_beat = np.round(end_position).astype(np.int64)
+    whole_bars = (
+        on_grid & (np.abs(end_position - end_beat) < ONSET_TOLERANCE)
+        & (end_beat > beat) & ((end_beat - beat) % beats_per_measure == 0)
+    )
+    weights = durations * (1.0 + whole_bars)
+    weight = np.bincount(beat[on_grid] % beats_per_measure, weights=weights[on_grid], minlength=beats_per_measure)
+    downbeat = phase + int(np.argmax(weight)) * period
+    measure = beats_per_measure * period
+    return float(downbeat - np.ceil((downbeat - onsets[0]) / measure) * measure)
+
+
+@timed('tempo.estimate')
+def estimate_tempo(chords, beats_per_measure=4, min_bpm=MIN_BPM, max_bpm=MAX_BPM):
+    """Estimar tempo, fase y downbeat a partir de los inicios de acorde
+
+    Los intervalos entre cada inicio y los siguientes se acumulan en un
+    histograma; cada tempo candidato se puntúa con la coherencia de fase de
+    esos intervalos respecto a su periodo (una autocorrelación sobre el
+    histograma, independiente de la longitud de la canción).
+
+    Los acordes solo fijan el pulso en que cambian; cualquier subdivisión
+    suya encaja igual de bien con los inicios. Entre candidatos igual de
+    coherentes decide una preferencia suave por tempos cercanos a
+    PRIOR_BPM. En compases binarios, si los 2/3 del tempo elegido son casi
+    igual de coherentes, el elegido era una subdivisión ternaria del pulso
+    (acordes cada 2 beats contados como 3) y se toman los 2/3. Si el doble o
+    la mitad empatan, decide el ritmo armónico (_resolve_octave). El
+    resultado se afina con un ajuste lineal de la rejilla de beats a los
+    inicios. Devuelve una TempoEstimate.
+    """
+    onsets, _ = chord_onsets(chords)
+    if len(onsets) < 2:
+        return TempoEstimate(DEFAULT_BPM, float(onsets[0]) if len(onsets) else 0.0, 0.0)
+
+    max_period = 60.0 / min_bpm
+    centers, weights = _interval_histogram(onsets, MAX_INTERVAL)
+    weights /= max(weights.sum(), 1.0)
+
+    def coherence(bpms):
+        # Coherencia de fase de los intervalos con cada periodo (candidatos x bins)
+        return np.cos(2 * np.pi * (np.asarray(bpms)[:, None] / 60.0) * centers[None, :]) @ weights
+
+    candidates = np.arange(min_bpm, max_bpm + BPM_STEP / 2, BPM_STEP)
+    scores = coherence(candidates)
+    best = int(np.argmax(scores * np.exp(-0.5 * np.log2(candidates / PRIOR_BPM) ** 2)))
+    bpm = candidates[best]
+    if beats_per_measure % 3 and bpm * 2 / 3 >= min_bpm:
+        if coherence([bpm * 2 / 3])[0] >= TRIPLET_THRESHOLD * scores[best]:
+            bpm = bpm * 2 / 3
+    octaves = np.array([bpm / 2, bpm * 2])
+    octaves = octaves[(octaves >= min_bpm) & (octaves <= max_bpm)]
+    if len(octaves):
+        tied = octaves[coherence(octaves) >= OCTAVE_THRESHOLD * coherence([bpm])[0]]
+        bpm = _resolve_octave(bpm, tied.tolist(), onsets, beats_per_measure)
+
+    period = 60.0 / bpm
+    phase = estimate_beat_grid(onsets, bpm)
+    period, phase = _grid_fit(onsets, period, phase)
+    period = float(np.clip(period, 60.0 / max_bpm, max_period))
+    bpm = 60.0 / period
+    phase %= period
+
+    position = (onsets - phase) / period
+    confidence = float(np.mean(np.abs(position - np.round(position)) < ONSET_TOLERANCE))
+    offset = estimate_downbeat(chords, bpm, beats_per_measure, phase)
+    return TempoEstimate(bpm, offset, confidence)
+
+
+def song_tempo(chords, beats_per_measure=4):
+    """Tempo estimado de la canción, guardado en caché por hash del contenido"""
+    timeline = ChordTimeline.coerce(chords)
+    key = (timeline.digest(), beats_per_measure)
+    estimate = tempo_cache.get(key)
+    if estimate is None:
+        estimate = estimate_tempo(timeline, beats_per_measure)
+        tempo_cache.put(key, estimate)
+    return estimate
+
+
+def tempo_defaults(chords, beats_per_measure=4, bpm=None):
+    """(bpm, offset, estimación) por defecto para el chart de la canción
+
+    Si la estimación es fiable (MIN_CONFIDENCE) se usan su tempo y su
+    downbeat; con otro ``bpm`` elegido por el usuario se recalcula el
+    downbeat para ese tempo (uno a menos de BPM_MATCH_TOLERANCE cuenta como
+    el estimado, que la interfaz redondea). Si no lo es, el tempo por
+    defecto es DEFAULT_BPM y el compás 1 empieza con el primer acorde.
+    """
+    estimate = song_tempo(chords, beats_per_measure)
+    reliable = estimate.confidence >= MIN_CONFIDENCE
+    if bpm is None:
+        bpm = estimate.bpm if reliable else DEFAULT_BPM
+    if not reliable:
+        timeline = ChordTimeline.coerce(chords)
+        offset = float(timeline.start.min()) if len(timeline) else 0.0
+    elif abs(bpm - estimate.bpm) < BPM_MATCH_TOLERANCE:
+        offset = estimate.offset
+    else:
+        offset = estimate_downbeat(chords, bpm, beats_per_measure)
+    return bpm, offset, estimate
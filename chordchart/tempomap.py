@@ -0,0 +1,154 @@
+import csv
+import hashlib
+import io
+import os
+
+import numpy as np
+
+from .cache import LRUCache
+from .errors import ChordDataError
+from .loader import ENCODING_ERROR
+
+# Sufijo del CSV de beats que acompaña a un CSV de acordes:
+# "cancion.mp3-chord_csv.csv" -> "cancion.mp3-chord_csv.beats.csv"
+TEMPO_MAP_SUFFIX = '.beats.csv'
+
+# Mapas de tempo ya leídos, por (ruta, mtime, tamaño) o hash del contenido
+tempo_map_cache = LRUCache(maxsize=32)
+
+
+class TempoMap:
+    """Mapa de tempo por tramos: el instante en segundos de cada beat.
+
+    Entre dos beats consecutivos el tempo es constante, así que convertir
+    segundos a beats es una interpolación lineal sobre ``beat_times``. El
+    beat ``downbeat`` (un índice de ``beat_times``) es el primer tiempo del
+    compás 1; los beats anteriores quedan en negativo.
+    """
+
+    __slots__ = ('beat_times', 'downbeat', '_digest')
+
+    def __init__(self, beat_times, downbeat=0):
+        self.beat_times = np.asarray(beat_times, dtype=np.float64)
+        if len(self.beat_times) < 2 or not np.all(np.diff(self.beat_times) > 0):
+            raise ChordDataError("El mapa de tempo necesita al menos dos beats en orden creciente")
+        self.downbeat = int(downbeat)
+        self._digest = None
+
+    @classmethod
+    def from_bpm(cls, bpm, offset=0.0, duration=0.0):
+        """Mapa de tempo constante que cubre ``duration`` segundos desde ``offset``"""
+        period = 60.0 / bpm
+        n_beats = max(int(np.ceil((duration - offset) / period)) + 1, 2)
+        return cls(offset + np.arange(n_beats) * period)
+
+    def __len__(self):
+        return len(self.beat_times)
+
+    def to_beats(self, seconds):
+        """Convertir segundos a beats (el beat 0 es el compás 1)
+
+        Cada instante busca su tramo con búsqueda binaria (O(log n) por
+        evento) y se interpola dentro de él. Antes del primer beat y después
+        del último se extrapola con el tempo del primer y último tramo.
+        """
+        times = self.beat_times
+        seconds = np.asarray(seconds, dtype=np.float64)
+        i = np.clip(np.searchsorted(times, seconds, side='right') - 1, 0, len(times) - 2)
+        return i + (seconds - times[i]) / (times[i + 1] - times[i]) - self.downbeat
+
+    def tempos(self):
+        """BPM de cada tramo entre beats consecutivos"""
+        return 60.0 / np.diff(self.beat_times)
+
+    @property
+    def bpm(self):
+        """Tempo mediano del mapa"""
+        return float(np.median(self.tempos()))
+
+    def digest(self):
+        """Hash del mapa, usado en las claves de caché de charts y PDF"""
+        if self._digest is None:
+            h = hashlib.blake2b(self.beat_times.tobytes(), digest_size=16)
+            h.update(self.downbeat.to_bytes(8, 'little', signed=True))
+            self._digest = h.hexdigest()
+        return self._digest
+
+
+def parse_tempo_map(text):
+    """Leer un CSV de beats: una fila por beat con su tiempo en segundos
+
+    La primera columna es el tiempo; una segunda columna opcional es la
+    posición del beat en el compás (1 = primer tiempo, como la exportan los
+    detectores de beats), y el primer beat con posición 1 marca el compás 1.
+    La cabecera es opcional. Lanza ChordDataError con los errores por fila.
+    """
+    times, positions, errors = [], [], []
+    for i, row in enumerate(csv.reader(io.StringIO(text))):
+        if not row or not row[0].strip():
+            continue
+        # Se leen los dos campos antes de guardar ninguno: una fila que se
+        # descarta no puede dejar su tiempo sin posición
+        try:
+            beat_time = float(row[0])
+            position = int(float(row[1])) if len(row) > 1 and row[1].strip() else 0
+        except ValueError as e:
+            if i == 0:
+                continue  # Cabecera
+            errors.append(f"Fila {i+1}: Error en formato numérico - {e}")
+            continue
+        times.append(beat_time)
+        positions.append(position)
+    if errors:
+        raise ChordDataError("El mapa de tempo tiene filas inválidas", errors)
+
+    downbeats = [i for i, position in enumerate(positions) if position == 1]
+    return TempoMap(times, downbeats[0] if downbeats else 0)
+
+
+def tempo_map_path(csv_path):
+    """Ruta del CSV de beats asociado a un CSV de acordes"""
+    base = csv_path[:-len('.csv')] if csv_path.endswith('.csv') else csv_path
+    return base + TEMPO_MAP_SUFFIX
+
+
+def is_tempo_map_file(name):
+    """True si ``name`` es un CSV de beats (no un CSV de acordes)"""
+    return name.endswith(TEMPO_MAP_SUFFIX)
+
+
+def read_tempo_map(path):
+    """Leer un CSV de beats local, guardado en tempo_map_cache por (ruta, mtime, tamaño)"""
+    file_stat = os.stat(path)
+    key = ('file', os.path.abspath(path), file_stat.st_mtime_ns, file_stat.st_size)
+    tempo_map = tempo_map_cache.get(key)
+    if tempo_map is None:
+        try:
+            with open(path, encoding='utf-8-sig') as f:
+                tempo_map = parse_tempo_map(f.read())
+        except UnicodeDecodeError:
+            raise ChordDataError(ENCODING_ERROR) from None
+        tempo_map_cache.put(key, tempo_map)
+    return tempo_map
+
+
+def read_tempo_map_upload(raw):
+    """Leer un CSV de beats subido (bytes), guardado en caché por hash del contenido"""
+    key = ('upload', hashlib.blake2b(raw, digest_size=16).hexdigest())
+    tempo_map = tempo_map_cache.get(key)
+    if tempo_map is None:
+        try:
+            text = raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ChordDataError(ENCODING_ERROR) from None
+        tempo_map = parse_tempo_map(text)
+        tempo_map_cache.put(key, tempo_map)
+    return tempo_map
+
+
+def load_sidecar_tempo_map(csv_path):
+    """Mapa de tempo del CSV de beats junto a ``csv_path``, o None si no hay"""
+    path = tempo_map_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    return read_tempo_map(path)
@@ -0,0 +1,138 @@
+import hashlib
+
+import numpy as np
+
+
+class ChordTimeline:
+    """Línea de tiempo de acordes en formato columnar.
+
+    Los nombres de acorde se guardan una sola vez en ``labels`` y cada evento
+    referencia su nombre mediante un código entero en ``codes``. Los tiempos de
+    inicio y fin se guardan en arrays de NumPy (float64).
+
+    Una vez creada, la línea de tiempo se trata como inmutable: todas las
+    transformaciones devuelven una nueva instancia.
+    """
+
+    __slots__ = ('labels', 'codes', 'start', 'end', '_digest')
+
+    def __init__(self, labels, codes, start, end):
+        self.labels = list(labels)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self._digest = None
+
+    @classmethod
+    def from_columns(cls, chords, starts, ends):
+        """Crear la línea de tiempo a partir de columnas (acordes, inicios, fines)"""
+        table = {}
+        codes = np.fromiter(
+            (table.setdefault(chord, len(table)) for chord in chords),
+            dtype=np.int32,
+            count=len(chords)
+        )
+        return cls(list(table), codes, starts, ends)
+
+    @classmethod
+    def from_records(cls, records):
+        """Crear la línea de tiempo desde una lista de diccionarios"""
+        records = list(records)
+        return cls.from_columns(
+            [r['chord'] for r in records],
+            np.fromiter((r['start'] for r in records), dtype=np.float64, count=len(records)),
+            np.fromiter((r['end'] for r in records), dtype=np.float64, count=len(records))
+        )
+
+    @classmethod
+    def coerce(cls, chords):
+        """Devolver ``chords`` como ChordTimeline (acepta listas de diccionarios)"""
+        if isinstance(chords, cls):
+            return chords
+        return cls.from_records(chords)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        # Adaptador de compatibilidad: se comporta como una lista de diccionarios
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice fuera de rango")
+        return self._record(index)
+
+    def __iter__(self):
+        return iter(self.to_records())
+
+    def _record(self, i):
+        return {
+            'chord': self.labels[self.codes[i]],
+            'start': float(self.start[i]),
+            'end': float(self.end[i])
+        }
+
+    def to_records(self):
+        """Convertir a la lista de diccionarios usada originalmente"""
+        labels = self.labels
+        return [
+            {'chord': labels[code], 'start': start, 'end': end}
+            for code, start, end in zip(self.codes.tolist(), self.start.tolist(), self.end.tolist())
+        ]
+
+    def chord_names(self):
+        """Nombre de acorde de cada evento, en orden"""
+        labels = self.labels
+        return [labels[code] for code in self.codes.tolist()]
+
+    def digest(self):
+        """Hash del contenido (acordes y tiempos), usado como clave de caché"""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update('\0'.join(self.labels).encode('utf-8'))
+            for array in (self.codes, self.start, self.end):
+                h.update(b'\1')
+                h.update(np.ascontiguousarray(array).tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    @property
+    def nbytes(self):
+        """Memoria aproximada ocupada (arrays más la tabla de nombres)"""
+        return (
+            self.codes.nbytes + self.start.nbytes + self.end.nbytes
+            + sum(len(label) + 49 for label in self.labels)
+        )
+
+    @property
+    def duration(self):
+        """Fin del último acorde en segundos"""
+        return float(self.end.max()) if len(self) else 0.0
+
+    def to_beats(self, bpm, offset=0.0):
+        """Convertir inicios y fines a beats con un tempo constante
+
+        ``offset`` son los segundos que corresponden al beat 0.
+        """
+        factor = bpm / 60.0
+        return (self.start - offset) * factor, (self.end - offset) * factor
+
+    def map_labels(self, func):
+        """Aplicar ``func`` a la tabla de nombres (una vez por acorde distinto).
+
+        Los nombres que quedan iguales tras la transformación se fusionan en
+        un solo código.
+        """
+        table = {}
+        remap = np.fromiter(
+            (table.setdefault(func(label), len(table)) for label in self.labels),
+            dtype=np.int32,
+            count=len(self.labels)
+        )
+        return ChordTimeline(list(table), remap[self.codes], self.start, self.end)
+
+    def counts(self):
+        """Número de apariciones de cada nombre de ``labels``"""
+        return np.bincount(self.codes, minlength=len(self.labels))
@@ -0,0 +1,136 @@
+import os
+import struct
+
+import numpy as np
+
+from .loader import read_chord_csv
+from .profiling import timed
+from .timeline import ChordTimeline
+
+# Formato binario de una ChordTimeline (todo little-endian, alineado a 8 bytes):
+#   cabecera   magic, versión, mtime_ns y tamaño del CSV de origen,
+#              nº de acordes, nº de nombres, bytes de la tabla de nombres
+#   offsets    int64[n_labels + 1] dentro de la tabla de nombres
+#   nombres    UTF-8 concatenados
+#   codes      int32[n]
+#   start/end  float64[n]
+TIMELINE_MAGIC = b'CTL\0'
+TIMELINE_VERSION = 1
+TIMELINE_HEADER = struct.Struct('<4sIqqQQQ')
+
+# Extensión del archivo binario que se guarda junto a cada CSV
+TIMELINE_SUFFIX = '.ctl'
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def timeline_path(csv_path):
+    """Ruta del archivo binario asociado a ``csv_path``"""
+    return csv_path + TIMELINE_SUFFIX
+
+
+def save_timeline(timeline, path, source_stat):
+    """Escribir ``timeline`` en formato binario
+
+    ``source_stat`` es el ``os.stat`` del CSV de origen; se guarda para
+    detectar cuándo el CSV cambia. Se escribe a un temporal y se renombra,
+    así un lector nunca ve un archivo a medias.
+    """
+    n = len(timeline)
+    encoded = [label.encode('utf-8') for label in timeline.labels]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    names = b''.join(encoded)
+
+    header = TIMELINE_HEADER.pack(
+        TIMELINE_MAGIC, TIMELINE_VERSION, source_stat.st_mtime_ns, source_stat.st_size,
+        n, len(encoded), len(names)
+    )
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(offsets.tobytes())
+            f.write(names)
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            f.write(timeline.codes.astype('<i4').tobytes())
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            f.write(timeline.start.astype('<f8').tobytes())
+            f.write(timeline.end.astype('<f8').tobytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_timeline(path, source_stat=None, mmap=True):
+    """Leer una ChordTimeline en formato binario
+
+    Con ``mmap=True`` los arrays son vistas de solo lectura sobre el archivo
+    mapeado en memoria (sin copia). Devuelve None si el archivo no existe o
+    no se puede leer, es de otra versión, no corresponde a ``source_stat`` o
+    está dañado: quien llama vuelve entonces al CSV.
+    """
+    try:
+        if mmap:
+            data = np.memmap(path, dtype=np.uint8, mode='r')
+        else:
+            data = np.fromfile(path, dtype=np.uint8)
+    except (OSError, ValueError):
+        return None  # No existe, sin permisos o vacío
+    if len(data) < TIMELINE_HEADER.size:
+        return None
+
+    magic, version, mtime_ns, size, n, n_labels, names_size = TIMELINE_HEADER.unpack(
+        data[:TIMELINE_HEADER.size].tobytes()
+    )
+    if magic != TIMELINE_MAGIC or version != TIMELINE_VERSION:
+        return None
+    if source_stat is not None and (mtime_ns, size) != (source_stat.st_mtime_ns, source_stat.st_size):
+        return None
+
+    names_pos = TIMELINE_HEADER.size + (n_labels + 1) * 8
+    codes_pos = _align(names_pos + names_size)
+    start_pos = _align(codes_pos + n * 4)
+    if len(data) < start_pos + n * 16:
+        return None  # Archivo truncado
+
+    try:
+        offsets = data[TIMELINE_HEADER.size:names_pos].view('<i8').tolist()
+        names = data[names_pos:names_pos + names_size].tobytes()
+        labels = [names[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+    except (UnicodeError, ValueError):
+        return None  # Tabla de nombres dañada o editada a mano
+    codes = data[codes_pos:codes_pos + n * 4].view('<i4')
+    start = data[start_pos:start_pos + n * 8].view('<f8')
+    end = data[start_pos + n * 8:start_pos + n * 16].view('<f8')
+    return ChordTimeline(labels, codes, start, end)
+
+
+@timed('load.csv_timeline')
+def load_csv_timeline(csv_path, mmap=True):
+    """Leer un CSV de acordes usando su archivo binario si está al día
+
+    Si el binario falta o el CSV cambió (mtime o tamaño), se vuelve a leer
+    el CSV y se reescribe el binario. Si no se puede escribir (directorio de
+    solo lectura, archivo en uso) se devuelve igualmente la timeline leída.
+    """
+    source_stat = os.stat(csv_path)
+    path = timeline_path(csv_path)
+    timeline = load_timeline(path, source_stat, mmap)
+    if timeline is not None:
+        return timeline
+
+    timeline, _ = read_chord_csv(csv_path, validate=False)
+    try:
+        save_timeline(timeline, path, source_stat)
+    except OSError:
+        return timeline
+    if mmap:
+        mapped = load_timeline(path, source_stat)
+        if mapped is not None:
+            return mapped
+    return timeline
@@ -0,0 +1,104 @@
+import numpy as np
+
+from .cache import LRUCache
+from .chords import NOTE_NAMES_FLAT, NOTE_NAMES_SHARP, QUALITY_CODES, format_chord, parse_chord_column
+from .profiling import timed
+from .timeline import ChordTimeline
+
+# Alteraciones de los nombres transportados (None: según la tonalidad)
+SPELLINGS = {'auto': None, 'sharps': False, 'flats': True}
+
+# Tonalidades mayores que se escriben con bemoles (F, Bb, Eb, Ab, Db)
+FLAT_MAJOR_KEYS = frozenset({5, 10, 3, 8, 1})
+
+# Tipos de acorde menores: su tonalidad se escribe como la de su relativo mayor
+MINOR_QUALITY_CODES = np.array([QUALITY_CODES[q] for q in ('min', 'min7', 'min6', 'min9', 'minmaj7')])
+
+# PITCH_TABLE[n][pc]: clase de altura pc subida n semitonos
+PITCH_TABLE = (np.arange(12)[None, :] + np.arange(12)[:, None]) % 12
+
+# Canciones ya transportadas, por (hash de la canción, desplazamiento, alteraciones)
+transpose_cache = LRUCache(maxsize=32)
+
+
+def _shift(pitch_classes, shift):
+    """Subir un array de clases de altura (-1 = sin nota) con la tabla precalculada"""
+    return np.where(pitch_classes >= 0, PITCH_TABLE[shift][np.maximum(pitch_classes, 0)], -1)
+
+
+def key_prefers_flats(timeline, column, roots):
+    """True si la tonalidad aproximada de la canción se escribe con bemoles
+
+    La tónica aproximada es la raíz del acorde que más tiempo suena; si es
+    menor, cuenta la tonalidad de su relativo mayor.
+    """
+    total_time = np.bincount(timeline.codes, weights=timeline.end - timeline.start, minlength=len(roots))
+    total_time[roots < 0] = -1.0
+    if not len(total_time) or total_time.max() < 0:
+        return False
+    tonic = int(np.argmax(total_time))
+    minor = np.isin(column.quality[tonic], MINOR_QUALITY_CODES)
+    return int(roots[tonic] + (3 if minor else 0)) % 12 in FLAT_MAJOR_KEYS
+
+
+@timed('transpose')
+def transpose_timeline(chords, semitones, prefer_flats=None):
+    """Transportar todos los acordes ``semitones`` semitonos (función pura, sin caché)
+
+    Solo se analiza y renombra la tabla de nombres distintos: las raíces y
+    los bajos son códigos de clase de altura que se desplazan con
+    PITCH_TABLE, y los eventos de la canción se reasignan con una sola
+    indexación de ``codes``. Los nombres que coinciden al transportar (p.
+    ej. A# y Bb) se fusionan. ``prefer_flats`` None elige sostenidos o
+    bemoles según la tonalidad de destino (key_prefers_flats).
+    """
+    timeline = ChordTimeline.coerce(chords)
+    shift = semitones % 12
+    if shift == 0 and prefer_flats is None:
+        return timeline
+
+    column = parse_chord_column(timeline.labels)
+    roots = _shift(column.root.astype(np.int64), shift)
+    basses = _shift(column.bass.astype(np.int64), shift)
+    if prefer_flats is None:
+        prefer_flats = key_prefers_flats(timeline, column, roots)
+    names = NOTE_NAMES_FLAT if prefer_flats else NOTE_NAMES_SHARP
+
+    labels = [
+        format_chord(symbol._replace(root=root, bass=None if bass < 0 else bass), names[root], prefer_flats)
+        if root >= 0 else symbol.label
+        for symbol, root, bass in zip(column.symbols, roots.tolist(), basses.tolist())
+    ]
+    table = {}
+    remap = np.fromiter((table.setdefault(label, len(table)) for label in labels), dtype=np.int32, count=len(labels))
+    return ChordTimeline(list(table), remap[timeline.codes], timeline.start, timeline.end)
+
+
+def transpose_chords(chords, semitones=0, capo=0, prefer_flats=None):
+    """Acordes para tocar la canción subida ``semitones`` con cejilla en el traste ``capo``
+
+    Con cejilla se escriben las posiciones (``semitones - capo``), que suenan
+    en el tono pedido. El resultado se guarda en transpose_cache por hash de
+    la canción y desplazamiento, así que cambiar de tono en la interfaz y
+    volver a uno ya visto no transporta de nuevo.
+    """
+    timeline = ChordTimeline.coerce(chords)
+    shift = (semitones - capo) % 12
+    if shift == 0 and prefer_flats is None:
+        return timeline
+    key = (timeline.digest(), shift, prefer_flats)
+    transposed = transpose_cache.get(key)
+    if transposed is None:
+        transposed = transpose_timeline(timeline, shift, prefer_flats)
+        transpose_cache.put(key, transposed)
+    return transposed
+
+
+def transposition_label(semitones=0, capo=0):
+    """Descripción breve para títulos ("+2 semitonos, cejilla 3"); vacía sin cambios"""
+    parts = []
+    if semitones:
+        parts.append(f"{semitones:+d} semitonos")
+    if capo:
+        parts.append(f"cejilla {capo}")
+    return ", ".join(parts)
@@ -0,0 +1,42 @@
+import struct
+
+import numpy as np
+
+# Tamaño de la cabecera de un WAV PCM canónico (RIFF + fmt + data)
+WAV_HEADER_SIZE = 44
+
+
+def wav_header(n_frames, sample_rate, channels=1, sample_width=2):
+    """Cabecera de un WAV PCM con ``n_frames`` frames"""
+    data_size = n_frames * channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b'data', data_size
+    )
+
+
+def create_wav_memmap(path, n_frames, sample_rate):
+    """Crear en disco un WAV mono 16-bit de ``n_frames`` y mapear su región PCM
+
+    El archivo se reserva completo (con la cabecera ya correcta) y se
+    devuelve un ``np.memmap`` int16 sobre los datos para rellenarlo sin
+    pasar por buffers en memoria. Llamar a ``flush()`` al terminar.
+    """
+    with open(path, 'wb') as f:
+        f.write(wav_header(n_frames, sample_rate))
+        f.truncate(WAV_HEADER_SIZE + n_frames * 2)
+    if n_frames == 0:
+        return np.zeros(0, dtype='<i2')  # np.memmap no admite regiones vacías
+    return np.memmap(path, dtype='<i2', mode='r+', offset=WAV_HEADER_SIZE, shape=(n_frames,))
+
+
+def save_wav_memmap(audio_data, sample_rate, path):
+    """Guardar audio 16-bit mono en ``path`` copiándolo directamente al archivo mapeado"""
+    pcm = create_wav_memmap(path, len(audio_data), sample_rate)
+    pcm[:] = audio_data
+    if isinstance(pcm, np.memmap):
+        pcm.flush()
+    return path
@@ -1,515 +1,148 @@
 import streamlit as st
 import pandas as pd
-import csv
-from fpdf import FPDF
-import base64
-import io
 import os
-import numpy as np
-import wave
-import struct
-import math
+import tempfile
+from itertools import islice
+
+from chordchart import ChordTimeline, chart_cache, envelope_cache, note_cache, pdf_cache, song_cache
+from chordchart.audio import (
+    generate_piano_envelope,
+    generate_piano_harmonics,
+    generate_tone,
+    get_scale_notes,
+    note_to_frequency,
+    render_scale_audio,
+    wav_bytes,
+)
+from chordchart.backing import render_backing_track
+from chordchart.batch import export_scales_zip
+from chordchart.chart import convert_to_beats, generate_chord_chart, iter_chord_chart
+from chordchart.chords import simplify_chord
+from chordchart.errors import ChordChartError
+from chordchart.midi import DEFAULT_WINDOW, load_midi_chords
+from chordchart.pdf import chart_pdf_bytes, generate_pdf
+from chordchart.profiling import instrumentation
+from chordchart.songs import load_chord_file, load_chord_upload
+from chordchart.stats import song_stats, top_chords
+from chordchart.tempo import MIN_CONFIDENCE, tempo_defaults
+from chordchart.tempomap import (
+    TEMPO_MAP_SUFFIX,
+    is_tempo_map_file,
+    load_sidecar_tempo_map,
+    read_tempo_map_upload,
+)
+from chordchart.transpose import SPELLINGS, transpose_chords, transposition_label
+from chordchart.wavfile import save_wav_memmap
+
+# Funciones que antes se definían en este script; las que ahora viven en
+# chordchart se siguen importando desde aquí por compatibilidad
+__all__ = [
+    'convert_to_beats',
+    'generate_chord_chart',
+    'generate_chord_chart_interface',
+    'generate_pdf',
+    'generate_piano_envelope',
+    'generate_piano_harmonics',
+    'generate_scale_audio',
+    'generate_scale_audio_interface',
+    'generate_tone',
+    'get_scale_notes',
+    'load_chord_data',
+    'load_chord_data_from_uploaded_file',
+    'main',
+    'note_to_frequency',
+    'save_wav_file',
+    'simplify_chord',
+]
 
 def load_chord_data(csv_file):
-    """Cargar datos de acordes desde archivo CSV"""
-    chords = []
+    """Cargar datos de acordes desde archivo CSV (ver chordchart.songs.load_chord_file)"""
     try:
-        with open(csv_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                chords.append({
-                    'chord': row['chord'],
-                    'start': float(row['start']),
-                    'end': float(row['end'])
-                })
-    except FileNotFoundError:
-        st.error(f"Archivo {csv_file} no encontrado")
+        return load_chord_file(csv_file)
+    except ChordChartError as e:
+        show_load_error(e)
         return []
-    return chords
 
 def load_chord_data_from_uploaded_file(uploaded_file):
-    """Cargar datos de acordes desde archivo CSV subido"""
-    chords = []
+    """Cargar datos de acordes desde archivo CSV subido (ver chordchart.songs.load_chord_upload)"""
     try:
-        # Leer el contenido del archivo subido
-        content = uploaded_file.read().decode('utf-8')
-        
-        # Verificar que el archivo no esté vacío
-        if not content.strip():
-            st.error("El archivo está vacío")
-            return []
-        
-        reader = csv.DictReader(io.StringIO(content))
-        
-        # Verificar que tiene las columnas necesarias
-        required_columns = {'chord', 'start', 'end'}
-        if not required_columns.issubset(reader.fieldnames):
-            st.error(f"El archivo debe tener las columnas: {', '.join(required_columns)}")
-            st.error(f"Columnas encontradas: {', '.join(reader.fieldnames) if reader.fieldnames else 'Ninguna'}")
-            return []
-        
-        # Procesar filas
-        invalid_rows = []
-        for i, row in enumerate(reader):
-            try:
-                chord_data = {
-                    'chord': row['chord'].strip(),
-                    'start': float(row['start']),
-                    'end': float(row['end'])
-                }
-                
-                # Validaciones adicionales
-                if not chord_data['chord']:
-                    invalid_rows.append(f"Fila {i+2}: Acorde vacío")
-                    continue
-                
-                if chord_data['start'] < 0 or chord_data['end'] < 0:
-                    invalid_rows.append(f"Fila {i+2}: Tiempos negativos no permitidos")
-                    continue
-                
-                if chord_data['start'] >= chord_data['end']:
-                    invalid_rows.append(f"Fila {i+2}: Tiempo de inicio debe ser menor que tiempo de fin")
-                    continue
-                
-                chords.append(chord_data)
-                
-            except ValueError as e:
-                invalid_rows.append(f"Fila {i+2}: Error en formato numérico - {e}")
-            except KeyError as e:
-                invalid_rows.append(f"Fila {i+2}: Columna faltante - {e}")
-        
-        # Mostrar advertencias sobre filas inválidas
-        if invalid_rows:
-            st.warning(f"Se omitieron {len(invalid_rows)} filas con errores:")
-            for error in invalid_rows[:5]:  # Mostrar solo los primeros 5 errores
-                st.caption(f"⚠️ {error}")
-            if len(invalid_rows) > 5:
-                st.caption(f"... y {len(invalid_rows) - 5} errores más")
-        
-        if not chords:
-            st.error("No se pudo procesar ninguna fila válida del archivo")
-            return []
-        
-    except UnicodeDecodeError:
-        st.error("Error de codificación. Asegúrate de que el archivo esté en formato UTF-8")
+        timeline, invalid_rows = load_chord_upload(uploaded_file.getvalue())
+    except ChordChartError as e:
+        show_load_error(e)
         return []
     except Exception as e:
         st.error(f"Error al procesar el archivo: {e}")
         return []
     
-    return chords
-
-def simplify_chord(chord):
-    """Simplificar notación de acordes"""
-    if ':maj' in chord:
-        return chord.replace(':maj', '')
-    elif ':min' in chord:
-        return chord.replace(':min', 'm')
-    else:
-        return chord
-
-def convert_to_beats(chords, bpm):
-    """Convertir tiempos en segundos a beats"""
-    for c in chords:
-        c['start_beat'] = c['start'] * (bpm / 60.0)
-        c['end_beat'] = c['end'] * (bpm / 60.0)
-    return chords
-
-def generate_chord_chart(chords, bpm, beats_per_measure, measures_per_line, chars_per_beat):
-    """Generar el chart de acordes como texto"""
-    if not chords:
-        return "No hay datos de acordes disponibles"
-    
-    # Convertir a beats
-    chords = convert_to_beats(chords.copy(), bpm)
-    
-    # Simplificar acordes
-    for c in chords:
-        c['chord'] = simplify_chord(c['chord'])
-    
-    # Calcular total de medidas
-    max_beat = max(c['end_beat'] for c in chords)
-    total_measures = int(max_beat // beats_per_measure) + 1
-    
-    chart_lines = []
-    current_measure = 0
-    
-    while current_measure < total_measures:
-        start_measure = current_measure
-        end_measure = min(start_measure + measures_per_line, total_measures)
-        
-        start_beat = start_measure * beats_per_measure
-        end_beat = end_measure * beats_per_measure
-        
-        # Calcular longitud de la línea
-        line_length = int((end_beat - start_beat) * chars_per_beat)
-        
-        # Inicializar líneas
-        chord_line = [' '] * line_length
-        bar_line = ['/'] * line_length
-        
-        # Colocar barras de compás
-        for m in range(start_measure, end_measure + 1):
-            beat_pos = (m - start_measure) * beats_per_measure
-            char_pos = int(beat_pos * chars_per_beat)
-            if char_pos < line_length:
-                bar_line[char_pos] = '|'
-        
-        # Colocar acordes en sus start_beat
-        for c in chords:
-            if start_beat <= c['start_beat'] < end_beat:
-                beat_pos = c['start_beat'] - start_beat
-                char_pos = int(beat_pos * chars_per_beat)
-                chord = c['chord']
-                # Limpiar espacio para el acorde
-                for i in range(len(chord)):
-                    if char_pos + i < line_length:
-                        chord_line[char_pos + i] = ' '
-                # Colocar el acorde
-                for i, char in enumerate(chord):
-                    if char_pos + i < line_length:
-                        chord_line[char_pos + i] = char
-        
-        # Agregar números de compás
-        measure_line = [' '] * line_length
-        for m in range(start_measure, end_measure):
-            beat_pos = (m - start_measure) * beats_per_measure
-            char_pos = int(beat_pos * chars_per_beat)
-            measure_num = str(m + 1)
-            if char_pos < line_length:
-                measure_line[char_pos] = measure_num[0] if len(measure_num) == 1 else measure_num[0]
-                if len(measure_num) > 1 and char_pos + 1 < line_length:
-                    measure_line[char_pos + 1] = measure_num[1]
-        
-        # Unir líneas
-        chord_str = ''.join(chord_line)
-        bar_str = ''.join(bar_line)
-        measure_str = ''.join(measure_line)
-        
-        # Agregar al chart
-        chart_lines.append(chord_str)
-        chart_lines.append(bar_str)
-        chart_lines.append(measure_str)
-        chart_lines.append('')  # Línea vacía entre sistemas
-        
-        current_measure = end_measure
-    
-    return '\n'.join(chart_lines)
+    show_invalid_rows(invalid_rows)
+    return timeline
 
-def generate_pdf(chart_text, title="Chord Chart"):
-    """Generar PDF del chart"""
-    try:
-        pdf = FPDF()
-        pdf.add_page()
-        
-        # Título
-        pdf.set_font("Arial", 'B', 16)
-        # Limpiar título de caracteres problemáticos
-        clean_title = title.encode('latin-1', errors='replace').decode('latin-1')
-        pdf.cell(0, 10, clean_title, ln=True, align='C')
-        pdf.ln(5)
-        
-        # Chart
-        pdf.set_font("Courier", size=9)  # Reducir tamaño para mejor ajuste
-        lines = chart_text.split('\n')
-        
-        for line in lines:
-            # Limpiar línea de caracteres problemáticos
-            clean_line = line.encode('latin-1', errors='replace').decode('latin-1')
-            # Truncar líneas muy largas
-            if len(clean_line) > 100:
-                clean_line = clean_line[:100] + "..."
-            
-            try:
-                pdf.cell(0, 4, clean_line, ln=True)
-            except:
-                # Si falla, usar una línea simplificada
-                pdf.cell(0, 4, line[:50] + "...", ln=True)
-        
-        return pdf
-    except Exception as e:
-        # Crear PDF básico en caso de error
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, "Error al generar chart", ln=True, align='C')
-        pdf.cell(0, 10, f"Error: {str(e)}", ln=True, align='C')
-        return pdf
+def show_invalid_rows(invalid_rows):
+    """Mostrar advertencias sobre filas inválidas"""
+    if invalid_rows:
+        st.warning(f"Se omitieron {len(invalid_rows)} filas con errores:")
+        for error in invalid_rows[:5]:  # Mostrar solo los primeros 5 errores
+            st.caption(f"⚠️ {error}")
+        if len(invalid_rows) > 5:
+            st.caption(f"... y {len(invalid_rows) - 5} errores más")
 
-def get_pdf_download_link(pdf, filename):
-    """Crear enlace de descarga para PDF"""
-    try:
-        # Usar BytesIO directamente para evitar problemas de codificación
-        pdf_bytes = pdf.output(dest='S')
-        if isinstance(pdf_bytes, str):
-            pdf_bytes = pdf_bytes.encode('latin-1', errors='replace')
-        
-        b64 = base64.b64encode(pdf_bytes).decode()
-        
-        # Limpiar el nombre del archivo para evitar caracteres problemáticos
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in "._- ").strip()
-        if not safe_filename.endswith('.pdf'):
-            safe_filename += '.pdf'
-        
-        href = f'<a href="data:application/pdf;base64,{b64}" download="{safe_filename}" style="text-decoration: none; background-color: #4CAF50; color: white; padding: 8px 16px; border-radius: 4px; display: inline-block;">📄 Descargar PDF</a>'
-        return href
-    except Exception as e:
-        st.error(f"Error al crear enlace de descarga: {e}")
-        return f"<p>Error al generar enlace de descarga</p>"
+def show_load_error(error):
+    """Mostrar un error de carga (una línea por mensaje) y sus avisos por fila"""
+    show_invalid_rows(getattr(error, 'diagnostics', []))
+    for message in str(error).splitlines():
+        st.error(message)
 
 # Funciones para generar audio de escalas
-def note_to_frequency(note_name):
-    """Convertir nombre de nota a frecuencia en Hz"""
-    # Mapeo de notas a semitonos desde A4 (440 Hz)
-    note_mapping = {
-        'C': -9, 'C#': -8, 'Db': -8,
-        'D': -7, 'D#': -6, 'Eb': -6,
-        'E': -5,
-        'F': -4, 'F#': -3, 'Gb': -3,
-        'G': -2, 'G#': -1, 'Ab': -1,
-        'A': 0, 'A#': 1, 'Bb': 1,
-        'B': 2
-    }
-    
-    # Extraer nota base (sin octava)
-    if len(note_name) > 1 and note_name[1] in ['#', 'b']:
-        base_note = note_name[:2]
-        octave = int(note_name[2:]) if len(note_name) > 2 else 4
-    else:
-        base_note = note_name[0]
-        octave = int(note_name[1:]) if len(note_name) > 1 else 4
-    
-    if base_note not in note_mapping:
-        return 440.0  # Default to A4
-    
-    # Calcular semitonos desde A4
-    semitones = note_mapping[base_note] + (octave - 4) * 12
-    
-    # Calcular frecuencia usando la fórmula: f = 440 * 2^(n/12)
-    frequency = 440.0 * (2 ** (semitones / 12.0))
-    return frequency
-
-def get_scale_notes(chord_name):
-    """Obtener las notas de la escala para un acorde dado"""
-    # Simplificar el nombre del acorde
-    chord_name = simplify_chord(chord_name)
-    
-    # Extraer nota raíz
-    if len(chord_name) > 1 and chord_name[1] in ['#', 'b']:
-        root = chord_name[:2]
-        chord_type = chord_name[2:]
-    else:
-        root = chord_name[0]
-        chord_type = chord_name[1:]
-    
-    # Definir intervalos de escalas (en semitonos)
-    scale_intervals = {
-        '': [0, 2, 4, 5, 7, 9, 11],        # Mayor
-        'maj': [0, 2, 4, 5, 7, 9, 11],     # Mayor
-        'm': [0, 2, 3, 5, 7, 8, 10],       # Menor natural
-        'min': [0, 2, 3, 5, 7, 8, 10],     # Menor natural
-        '7': [0, 2, 4, 5, 7, 9, 10],       # Dominante
-        'maj7': [0, 2, 4, 5, 7, 9, 11],    # Mayor séptima
-        'm7': [0, 2, 3, 5, 7, 8, 10],      # Menor séptima
-    }
-    
-    intervals = scale_intervals.get(chord_type.lower(), scale_intervals[''])
-    
-    # Nota raíz a número MIDI (C4 = 60)
-    note_to_midi = {
-        'C': 60, 'C#': 61, 'Db': 61,
-        'D': 62, 'D#': 63, 'Eb': 63,
-        'E': 64,
-        'F': 65, 'F#': 66, 'Gb': 66,
-        'G': 67, 'G#': 68, 'Ab': 68,
-        'A': 69, 'A#': 70, 'Bb': 70,
-        'B': 71
-    }
-    
-    root_midi = note_to_midi.get(root, 60)
-    
-    # Generar notas de la escala
-    scale_notes = []
-    for interval in intervals:
-        midi_note = root_midi + interval
-        frequency = 440.0 * (2 ** ((midi_note - 69) / 12.0))
-        scale_notes.append(frequency)
-    
-    return scale_notes
-
-def generate_piano_harmonics(frequency, t, amplitude=0.3):
-    """Generar armónicos para simular sonido de piano"""
-    # Armónicos más realistas del piano con amplitudes más suaves
-    harmonics = [
-        (1.0, 1.0),      # Fundamental
-        (2.0, 0.4),      # Segunda armónica (reducida)
-        (3.0, 0.15),     # Tercera armónica (reducida)
-        (4.0, 0.08),     # Cuarta armónica (reducida)
-        (5.0, 0.04),     # Quinta armónica (reducida)
-        (6.0, 0.02),     # Sexta armónica (reducida)
-    ]
-    
-    wave = np.zeros_like(t)
-    for harmonic_freq, harmonic_amp in harmonics:
-        # Añadir slight detuning natural para realismo (muy sutil)
-        detuning = 1.0 + (harmonic_freq - 1) * 0.001  # Muy pequeño desajuste
-        wave += harmonic_amp * np.sin(2 * np.pi * frequency * harmonic_freq * detuning * t)
-    
-    return amplitude * wave
-
-def generate_piano_envelope(duration_seconds, sample_rate):
-    """Generar envolvente ADSR típica del piano"""
-    total_samples = int(sample_rate * duration_seconds)
-    
-    # Parámetros ADSR más suaves para piano
-    attack_time = 0.005   # 5ms attack muy rápido
-    decay_time = 0.15     # 150ms decay más suave
-    sustain_level = 0.8   # 80% del volumen máximo (más alto)
-    release_time = min(0.4, duration_seconds * 0.5)  # Release suave
-    
-    attack_samples = int(attack_time * sample_rate)
-    decay_samples = int(decay_time * sample_rate)
-    release_samples = int(release_time * sample_rate)
-    sustain_samples = max(0, total_samples - attack_samples - decay_samples - release_samples)
-    
-    envelope = np.ones(total_samples)
-    
-    # Attack: 0 a 1 con curva exponencial suave
-    if attack_samples > 0:
-        attack_curve = np.linspace(0, 1, attack_samples)
-        # Aplicar curva exponencial para ataque más natural
-        attack_curve = 1 - np.exp(-5 * attack_curve)
-        envelope[:attack_samples] = attack_curve
-    
-    # Decay: 1 a sustain_level con curva exponencial
-    if decay_samples > 0:
-        start_idx = attack_samples
-        end_idx = start_idx + decay_samples
-        decay_curve = np.linspace(0, 1, decay_samples)
-        # Curva exponencial para decay más natural
-        decay_curve = np.exp(-2 * decay_curve)
-        envelope[start_idx:end_idx] = sustain_level + (1 - sustain_level) * decay_curve
-    
-    # Sustain: mantener sustain_level
-    if sustain_samples > 0:
-        start_idx = attack_samples + decay_samples
-        end_idx = start_idx + sustain_samples
-        envelope[start_idx:end_idx] = sustain_level
-    
-    # Release: sustain_level a 0 con curva exponencial suave
-    if release_samples > 0:
-        start_idx = total_samples - release_samples
-        release_curve = np.linspace(0, 1, release_samples)
-        # Curva exponencial para release más natural
-        release_curve = sustain_level * np.exp(-3 * release_curve)
-        envelope[start_idx:] = release_curve
-    
-    return envelope
-
-def generate_tone(frequency, duration_ms, sample_rate=44100, amplitude=0.3, instrument="piano"):
-    """Generar un tono con diferentes tipos de instrumento"""
-    duration_seconds = duration_ms / 1000.0
-    t = np.linspace(0, duration_seconds, int(sample_rate * duration_seconds))
-    
-    if instrument == "piano":
-        # Generar sonido de piano con armónicos (SIN vibrato)
-        wave_data = generate_piano_harmonics(frequency, t, amplitude)
-        
-        # Aplicar envolvente ADSR del piano
-        envelope = generate_piano_envelope(duration_seconds, sample_rate)
-        wave_data *= envelope
-        
-    elif instrument == "sine":
-        # Tono senoidal simple (original)
-        wave_data = amplitude * np.sin(2 * np.pi * frequency * t)
-        
-        # Aplicar envolvente simple
-        envelope_length = int(0.01 * sample_rate)  # 10ms fade
-        if len(wave_data) > 2 * envelope_length:
-            wave_data[:envelope_length] *= np.linspace(0, 1, envelope_length)
-            wave_data[-envelope_length:] *= np.linspace(1, 0, envelope_length)
-    
-    elif instrument == "organ":
-        # Sonido de órgano con armónicos específicos
-        wave_data = amplitude * (
-            np.sin(2 * np.pi * frequency * t) +
-            0.5 * np.sin(2 * np.pi * frequency * 2 * t) +
-            0.3 * np.sin(2 * np.pi * frequency * 3 * t)
-        )
-        
-        # Envolvente más sostenida para órgano
-        envelope_length = int(0.05 * sample_rate)
-        if len(wave_data) > 2 * envelope_length:
-            wave_data[:envelope_length] *= np.linspace(0, 1, envelope_length)
-            wave_data[-envelope_length:] *= np.linspace(1, 0, envelope_length)
-    
-    return wave_data
+def generate_scale_audio(chord_name, note_duration_ms=700, repetitions=1, ascending=True, descending=True, instrument="piano",
+                         out_path=None):
+    """Generar audio de escala para un acorde
 
-def generate_scale_audio(chord_name, note_duration_ms=700, repetitions=1, ascending=True, descending=True, instrument="piano"):
-    """Generar audio de escala para un acorde"""
+    Con ``out_path`` el audio se escribe directamente en ese WAV en disco.
+    """
     try:
-        scale_frequencies = get_scale_notes(chord_name)
-        sample_rate = 44100
-        
-        # Crear secuencia de notas
-        sequence = []
-        
-        for rep in range(repetitions):
-            if ascending:
-                sequence.extend(scale_frequencies)
-            if descending:
-                sequence.extend(reversed(scale_frequencies))
-        
-        # Generar audio completo
-        audio_data = []
-        silence_duration_ms = 50  # Pequeña pausa entre notas
-        
-        for i, frequency in enumerate(sequence):
-            # Generar tono con el instrumento seleccionado
-            tone = generate_tone(frequency, note_duration_ms, sample_rate, instrument=instrument)
-            audio_data.extend(tone)
-            
-            # Añadir pequeña pausa entre notas (excepto la última)
-            if i < len(sequence) - 1:
-                silence_samples = int(silence_duration_ms * sample_rate / 1000)
-                audio_data.extend(np.zeros(silence_samples))
-        
-        # Convertir a array de numpy
-        audio_array = np.array(audio_data)
-        
-        # Normalizar
-        if np.max(np.abs(audio_array)) > 0:
-            audio_array = audio_array / np.max(np.abs(audio_array)) * 0.8
-        
-        # Convertir a 16-bit PCM
-        audio_16bit = (audio_array * 32767).astype(np.int16)
-        
-        return audio_16bit, sample_rate
-        
+        return render_scale_audio(chord_name, note_duration_ms, repetitions, ascending, descending, instrument, out_path)
     except Exception as e:
         st.error(f"Error generando audio: {e}")
         return None, None
 
-def save_wav_file(audio_data, sample_rate, filename):
-    """Guardar audio como archivo WAV"""
+def save_wav_file(audio_data, sample_rate, filename, to_disk=False):
+    """Guardar audio como archivo WAV
+
+    Por defecto devuelve los bytes del WAV. Con ``to_disk=True`` lo escribe en
+    ``filename`` a través de np.memmap (sin copia en memoria) y devuelve la ruta.
+    """
     try:
-        # Crear archivo WAV en memoria
-        wav_buffer = io.BytesIO()
-        
-        with wave.open(wav_buffer, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio_data.tobytes())
-        
-        wav_buffer.seek(0)
-        return wav_buffer.getvalue()
-        
+        if to_disk:
+            return save_wav_memmap(audio_data, sample_rate, filename)
+        return wav_bytes(audio_data, sample_rate)
     except Exception as e:
         st.error(f"Error guardando archivo WAV: {e}")
         return None
 
+def show_wav(path, label, file_name):
+    """Reproductor y botón de descarga de un WAV en disco
+
+    El archivo se lee una sola vez: st.audio y st.download_button guardan los
+    bytes tal cual en el gestor de medios de Streamlit, así que los dos
+    comparten la misma copia en memoria (leerlo por separado la duplicaba).
+    """
+    with open(path, 'rb') as wav_file:
+        wav_data = wav_file.read()
+    st.audio(wav_data, format="audio/wav")
+    st.download_button(label=label, data=wav_data, file_name=file_name, mime="audio/wav")
+
 # Interfaz de Streamlit
+
+# st.download_button acepta un callable como ``data`` (generación al hacer clic)
+# desde Streamlit 1.52; las versiones anteriores lanzan StreamlitAPIException
+DOWNLOAD_ACCEPTS_CALLABLE = tuple(int(part) for part in st.__version__.split('.')[:2]) >= (1, 52)
+
+# Texto de cada opción de alteraciones (claves de chordchart.transpose.SPELLINGS)
+SPELLING_LABELS = {'auto': "Según el tono", 'sharps': "#", 'flats': "b"}
+
+# Sistemas por cada bloque del chart mostrado en pantalla
+CHART_DISPLAY_BLOCK_SYSTEMS = 25
+
 def main():
     st.set_page_config(page_title="Generador de Chart de Acordes", layout="wide")
     
@@ -523,10 +156,62 @@ def main():
         index=1
     )
     
+    debug_panel = instrumentation_controls()
+    
     if menu_option == "📊 Generar Chart de Acordes":
-        generate_chord_chart_interface()
+        with instrumentation.stage('ui.chart_page'):
+            generate_chord_chart_interface()
     elif menu_option == "🎵 Generar Audio de Escalas":
-        generate_scale_audio_interface()
+        with instrumentation.stage('ui.scale_page'):
+            generate_scale_audio_interface()
+    
+    # Al final, para incluir las medidas de esta ejecución (sin canción
+    # cargada st.stop() corta antes y el panel solo muestra las casillas)
+    show_instrumentation(debug_panel)
+
+def instrumentation_controls():
+    """Panel de depuración: activar la medición por etapas (chordchart.profiling)
+
+    Las medidas son del proceso (se acumulan entre ejecuciones y sesiones);
+    por defecto las casillas siguen a CHORDCHART_PROFILE.
+    """
+    panel = st.sidebar.expander("🛠️ Depuración")
+    with panel:
+        enabled = st.checkbox("Medir etapas", value=instrumentation.enabled)
+        trace_memory = st.checkbox("Memoria (tracemalloc)", value=instrumentation.trace_memory, disabled=not enabled)
+        profile = st.checkbox("Perfil (cProfile)", value=instrumentation.profile, disabled=not enabled)
+        instrumentation.configure(enabled, trace_memory, profile)
+        if enabled and st.button("Reiniciar medidas"):
+            instrumentation.reset()
+    return panel
+
+def show_instrumentation(panel):
+    """Tabla de etapas, descarga JSON y resumen de cProfile en el panel de depuración"""
+    if not instrumentation.enabled:
+        return
+    with panel:
+        report = instrumentation.to_dict()
+        if not report['stages']:
+            st.caption("Sin medidas todavía")
+            return
+        table = pd.DataFrame.from_dict(report['stages'], orient='index').sort_values('seconds', ascending=False)
+        table = pd.DataFrame({
+            'llamadas': table['calls'],
+            'total s': table['seconds'].round(3),
+            'máx s': table['max_seconds'].round(3),
+            'última s': table['last_seconds'].round(3),
+            'pico MB': (table['peak_bytes'] / 1e6).round(1),
+        })
+        st.dataframe(table, use_container_width=True)
+        st.download_button(
+            label="💾 Descargar medidas JSON",
+            data=instrumentation.to_json(),
+            file_name="chordchart_profile.json",
+            mime="application/json"
+        )
+        profile = instrumentation.profile_text()
+        if profile:
+            st.code(profile, language=None)
 
 def generate_scale_audio_interface():
     """Interfaz para generar audio de escalas"""
@@ -606,40 +291,36 @@ def generate_scale_audio_interface():
             if chord_name.strip():
                 with st.spinner("Generando audio..."):
                     try:
-                        # Generar audio
-                        audio_data, sample_rate = generate_scale_audio(
-                            chord_name.strip(),
-                            note_duration,
-                            repetitions,
-                            ascending,
-                            descending,
-                            instrument
-                        )
-                        
-                        if audio_data is not None:
-                            # Guardar como WAV
-                            wav_data = save_wav_file(audio_data, sample_rate, "scale_audio.wav")
+                        filename = f"escala_{chord_name.strip().replace(':', '_')}_{instrument}_{note_duration}ms.wav"
+                        # Un WAV temporal propio por render: dos sesiones que generan la
+                        # misma escala no se pisan el archivo. Streamlit guarda sus bytes
+                        # en memoria al mostrarlo (show_wav), así que se borra al terminar
+                        fd, wav_path = tempfile.mkstemp(prefix="escala_", suffix=".wav")
+                        os.close(fd)
+                        try:
+                            # Generar audio directamente en el WAV en disco (el memmap
+                            # devuelto no se guarda, así el archivo queda cerrado)
+                            generated = generate_scale_audio(
+                                chord_name.strip(),
+                                note_duration,
+                                repetitions,
+                                ascending,
+                                descending,
+                                instrument,
+                                out_path=wav_path
+                            )[0] is not None
                             
-                            if wav_data:
-                                # Mostrar reproductor de audio
+                            if generated:
+                                # Reproductor y botón de descarga
                                 st.success("🎉 Audio generado exitosamente!")
-                                st.audio(wav_data, format="audio/wav")
-                                
-                                # Botón de descarga
-                                filename = f"escala_{chord_name.strip().replace(':', '_')}_{instrument}_{note_duration}ms.wav"
-                                st.download_button(
-                                    label="💾 Descargar Audio WAV",
-                                    data=wav_data,
-                                    file_name=filename,
-                                    mime="audio/wav"
-                                )
-                                
+                                show_wav(wav_path, "💾 Descargar Audio WAV", filename)
+                            
                                 # Información del archivo generado
                                 scale_notes = get_scale_notes(chord_name.strip())
                                 duration_total = len(scale_notes) * note_duration * repetitions
                                 if ascending and descending:
                                     duration_total *= 2
-                                
+                            
                                 st.markdown(f"""
                                 **📊 Información del audio:**
                                 - **Acorde:** {simplify_chord(chord_name.strip())}
@@ -650,9 +331,9 @@ def generate_scale_audio_interface():
                                 - **Duración total:** ~{duration_total/1000:.1f} segundos
                                 """)
                             else:
-                                st.error("Error al procesar el audio")
-                        else:
-                            st.error("No se pudo generar el audio")
+                                st.error("No se pudo generar el audio")
+                        finally:
+                            os.remove(wav_path)
                     
                     except Exception as e:
                         st.error(f"Error: {e}")
@@ -683,6 +364,17 @@ def generate_scale_audio_interface():
             - `:min` se convierte en `m` (menor)
             - Si no se especifica tipo, se asume mayor
             """)
+        
+        # Estadísticas de las cachés de notas y envolventes
+        with st.expander("Caché de audio"):
+            for cache_name, cache in [("Notas", note_cache), ("Envolventes", envelope_cache)]:
+                cache_stats = cache.stats()
+                st.write(
+                    f"• **{cache_name}:** {cache_stats['entries']} entradas, "
+                    f"{cache_stats['bytes'] / 1e6:.1f} / {cache_stats['max_bytes'] / 1e6:.0f} MB, "
+                    f"{cache_stats['hits']} aciertos, {cache_stats['misses']} fallos, "
+                    f"{cache_stats['evictions']} descartes ({cache_stats['evicted_bytes'] / 1e6:.1f} MB)"
+                )
 
 def generate_chord_chart_interface():
     """Interfaz para generar charts de acordes"""
@@ -690,24 +382,57 @@ def generate_chord_chart_interface():
     st.markdown("---")
     
     # Pestañas para diferentes opciones de carga
-    tab1, tab2 = st.tabs(["📂 Archivos locales", "⬆️ Subir archivo CSV"])
+    tab1, tab2, tab3 = st.tabs(["📂 Archivos locales", "⬆️ Subir archivo CSV", "🎹 MIDI"])
     
     chords = []
     file_source = ""
+    csv_path = None  # CSV local cargado (para buscar su CSV de beats)
     
     with tab1:
         st.markdown("### Seleccionar archivo CSV del directorio actual")
         # Cargar archivo CSV local
-        csv_files = [f for f in os.listdir('.') if f.endswith('.csv')]
+        csv_files = [f for f in os.listdir('.') if f.endswith('.csv') and not is_tempo_map_file(f)]
         
         if csv_files:
             selected_file = st.selectbox("Archivos CSV disponibles:", csv_files)
             if st.button("Cargar archivo seleccionado", type="secondary"):
-                chords = load_chord_data(selected_file)
-                file_source = selected_file
+                # El botón solo vale True en la ejecución del clic: recordar
+                # la selección para que sobreviva a las siguientes interacciones
+                st.session_state['selected_csv'] = selected_file
+                st.session_state.pop('selected_midi', None)
+            
+            loaded_file = st.session_state.get('selected_csv')
+            if loaded_file in csv_files:
+                chords = load_chord_data(loaded_file)
+                file_source = loaded_file
+                csv_path = loaded_file
         else:
             st.warning("No se encontraron archivos CSV en el directorio actual")
     
+    with tab3:
+        st.markdown("### Detectar acordes desde archivos MIDI")
+        midi_files = sorted(f for f in os.listdir('.') if f.lower().endswith(('.mid', '.midi')))
+        
+        if midi_files:
+            # Por defecto, el MIDI de acordes de fadr (sin sufijo de pista)
+            default_midi = [f for f in midi_files if f.endswith('-midi.mid')] or midi_files[:1]
+            selected_midi = st.multiselect("Archivos MIDI (se combinan sus notas):", midi_files, default=default_midi)
+            midi_window = st.slider("Ventana de análisis (segundos)", min_value=0.1, max_value=2.0, value=DEFAULT_WINDOW, step=0.05)
+            if st.button("Detectar acordes", type="secondary", disabled=not selected_midi):
+                st.session_state['selected_midi'] = tuple(selected_midi)
+                st.session_state.pop('selected_csv', None)
+            
+            loaded_midi = st.session_state.get('selected_midi')
+            if loaded_midi and set(loaded_midi) <= set(midi_files):
+                try:
+                    chords = load_midi_chords(list(loaded_midi), window=midi_window)
+                    file_source = ", ".join(loaded_midi)
+                    csv_path = None
+                except ChordChartError as e:
+                    st.error(f"Error al leer el MIDI: {e}")
+        else:
+            st.info("No se encontraron archivos MIDI en el directorio actual")
+    
     with tab2:
         st.markdown("### Subir un archivo CSV nuevo")
         
@@ -748,6 +473,7 @@ D:maj,8.123456789,10.987654321"""
             # Cargar y procesar el archivo
             chords = load_chord_data_from_uploaded_file(uploaded_file)
             file_source = uploaded_file.name
+            csv_path = None
             
             # Mostrar preview de los primeros registros
             if chords:
@@ -777,92 +503,218 @@ D:maj,8.123456789,10.987654321"""
     # Configuraciones en sidebar
     st.sidebar.header("⚙️ Configuraciones")
     
-    bpm = st.sidebar.number_input("BPM (Beats por minuto)", min_value=60, max_value=200, value=120, step=5)
     beats_per_measure = st.sidebar.selectbox("Beats por compás", [3, 4, 6, 8], index=1)
+    
+    # Mapa de tempo variable: un CSV de beats subido o el que acompaña al CSV
+    # local; si hay uno, manda sobre el BPM y el inicio del compás 1
+    tempo_map = None
+    beats_upload = st.sidebar.file_uploader(
+        "Mapa de tempo (CSV de beats, opcional)", type=['csv'],
+        help="Una fila por beat con su tiempo en segundos y, opcionalmente, su posición en el compás "
+             f"(1 = primer tiempo). Junto a un CSV local se busca como '*{TEMPO_MAP_SUFFIX}'."
+    )
+    try:
+        if beats_upload is not None:
+            tempo_map = read_tempo_map_upload(beats_upload.getvalue())
+        elif csv_path is not None:
+            tempo_map = load_sidecar_tempo_map(csv_path)
+    except ChordChartError as e:
+        show_load_error(e)
+    
+    # Tempo y compás 1 estimados a partir de los inicios de acorde; el usuario
+    # puede corregirlos y el inicio del compás se recalcula para su tempo
+    default_bpm, _, tempo = tempo_defaults(chords, beats_per_measure)
+    if tempo_map is not None:
+        default_bpm = min(max(tempo_map.bpm, 60.0), 200.0)
+    bpm = st.sidebar.number_input(
+        "BPM (Beats por minuto)", min_value=60.0, max_value=200.0, value=round(default_bpm, 2), step=0.5,
+        format="%.2f", disabled=tempo_map is not None
+    )
+    _, default_offset, _ = tempo_defaults(chords, beats_per_measure, bpm)
+    offset = st.sidebar.number_input(
+        "Inicio del compás 1 (segundos)", value=round(default_offset, 3), step=0.01, format="%.3f",
+        help="Segundos del primer tiempo del compás 1; negativo si la canción empieza con anacrusa",
+        disabled=tempo_map is not None
+    )
+    if tempo_map is not None:
+        tempos = tempo_map.tempos()
+        st.sidebar.caption(f"Mapa de tempo: {len(tempo_map)} beats, {tempos.min():.1f}-{tempos.max():.1f} BPM "
+                           f"(mediana {tempo_map.bpm:.1f})")
+    elif tempo.confidence >= MIN_CONFIDENCE:
+        st.sidebar.caption(f"Tempo estimado: {tempo.bpm:.2f} BPM (confianza {tempo.confidence:.0%})")
+    else:
+        st.sidebar.caption(f"No se detectó un tempo claro (confianza {tempo.confidence:.0%}); "
+                           f"el compás 1 empieza con el primer acorde")
     measures_per_line = st.sidebar.number_input("Compases por línea", min_value=2, max_value=8, value=4, step=1)
     chars_per_beat = st.sidebar.slider("Espaciado (caracteres por beat)", min_value=4, max_value=12, value=8, step=1)
     
+    # Transposición y cejilla: el chart muestra las posiciones a tocar, la
+    # pista de acompañamiento suena en el tono transportado
+    semitones = st.sidebar.slider("Transponer (semitonos)", min_value=-11, max_value=11, value=0, step=1)
+    capo = st.sidebar.selectbox("Cejilla (traste)", list(range(12)), index=0)
+    spelling = st.sidebar.radio(
+        "Alteraciones", list(SPELLING_LABELS), format_func=SPELLING_LABELS.get, horizontal=True
+    )
+    chart_chords = transpose_chords(chords, semitones, capo, SPELLINGS[spelling])
+    sounding_chords = transpose_chords(chords, semitones, 0, SPELLINGS[spelling])
+    
     # Mostrar información de la canción
     if chords:
-        duration = max(c['end'] for c in chords)
-        unique_chords = list(set([simplify_chord(c['chord']) for c in chords]))
+        # Todas las estadísticas salen de una pasada, en caché por canción
+        stats = song_stats(chords)
+        duration = stats.duration
+        unique_chords = stats.labels
         
         st.sidebar.markdown("### 📊 Información de la canción")
         st.sidebar.metric("Duración", f"{duration:.1f} segundos", f"{duration/60:.1f} minutos")
-        st.sidebar.metric("Total acordes", len(chords))
+        st.sidebar.metric("Total acordes", stats.total_chords)
         st.sidebar.metric("Acordes únicos", len(unique_chords))
         
         # Mostrar acordes más frecuentes
-        chord_counts = {}
-        for chord in chords:
-            simplified = simplify_chord(chord['chord'])
-            chord_counts[simplified] = chord_counts.get(simplified, 0) + 1
-        
-        most_common = sorted(chord_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        
         st.sidebar.markdown("**Acordes más frecuentes:**")
-        for chord, count in most_common:
-            st.sidebar.write(f"• {chord}: {count} veces")
+        for chord, count, seconds in top_chords(stats, 5):
+            st.sidebar.write(f"• {chord}: {count} veces ({seconds:.1f} s)")
         
         # Mostrar todos los acordes únicos
         with st.sidebar.expander("Ver todos los acordes únicos"):
             st.write(", ".join(sorted(unique_chords)))
         
+        # Histograma y tiempo total por acorde
+        with st.sidebar.expander("Frecuencia y tiempo por acorde"):
+            st.bar_chart(pd.DataFrame({'veces': stats.counts}, index=unique_chords))
+            st.dataframe(
+                pd.DataFrame({'veces': stats.counts, 'segundos': stats.total_time.round(1)}, index=unique_chords)
+                .sort_values('veces', ascending=False),
+                use_container_width=True
+            )
+        
+        # Ritmo armónico
+        with st.sidebar.expander("Ritmo armónico"):
+            rhythm = stats.harmonic_rhythm
+            st.write(f"• **Cambios de acorde:** {rhythm['changes']} ({rhythm['changes_per_minute']:.1f} por minuto)")
+            st.write(f"• **Duración media:** {rhythm['mean_duration']:.2f} s")
+            st.write(f"• **Duración mediana:** {rhythm['median_duration']:.2f} s")
+            st.write(f"• **Más corto / más largo:** {rhythm['min_duration']:.2f} s / {rhythm['max_duration']:.2f} s")
+        
+        # Exportar en un ZIP el audio de la escala de cada acorde único
+        if st.sidebar.button("🎵 Exportar escalas de todos los acordes"):
+            progress_bar = st.sidebar.progress(0.0, text="Generando escalas...")
+            zip_bytes, errors = export_scales_zip(
+                unique_chords,
+                progress=lambda done, total, chord: progress_bar.progress(
+                    done / total, text=f"{chord} ({done}/{total})"
+                )
+            )
+            for chord, error in errors.items():
+                st.sidebar.warning(f"No se pudo generar la escala de {chord}: {error}")
+            clean_filename = file_source.replace('.csv', '').replace(' ', '_')
+            st.sidebar.download_button(
+                label="💾 Descargar ZIP de escalas",
+                data=zip_bytes,
+                file_name=f"escalas_{clean_filename}.zip",
+                mime="application/zip"
+            )
+        
         # Información adicional del archivo
         st.sidebar.markdown("---")
         st.sidebar.markdown("**📁 Archivo cargado:**")
         st.sidebar.write(f"• **Nombre:** {file_source}")
-        st.sidebar.write(f"• **Primer acorde:** {simplify_chord(chords[0]['chord'])}")
-        st.sidebar.write(f"• **Último acorde:** {simplify_chord(chords[-1]['chord'])}")
+        st.sidebar.write(f"• **Primer acorde:** {stats.first_chord}")
+        st.sidebar.write(f"• **Último acorde:** {stats.last_chord}")
+        
+        # Estadísticas de la caché de charts renderizados
+        with st.sidebar.expander("Caché del chart"):
+            cache_stats = chart_cache.stats()
+            st.write(f"• **Aciertos:** {cache_stats['hits']}")
+            st.write(f"• **Fallos:** {cache_stats['misses']}")
+            st.write(f"• **Entradas:** {cache_stats['entries']} / {cache_stats['maxsize']} "
+                     f"({cache_stats['bytes'] / 1e6:.1f} / {cache_stats['max_bytes'] / 1e6:.0f} M caracteres)")
+            song_stats_cache = song_cache.stats()
+            st.write(f"• **Canciones en caché:** {song_stats_cache['entries']} "
+                     f"({song_stats_cache['bytes'] / 1024:.1f} KB, {song_stats_cache['hits']} aciertos)")
     
     # Generar chart
     st.markdown("### 🎼 Chart de Acordes")
     
-    chart_text = generate_chord_chart(chords, bpm, beats_per_measure, measures_per_line, chars_per_beat)
+    chart_args = (chart_chords, bpm, beats_per_measure, measures_per_line, chars_per_beat, offset, tempo_map)
     
-    # Mostrar chart en un código block para mantener formato
-    st.code(chart_text, language=None)
+    # Mostrar el chart por bloques de sistemas a medida que se generan
+    # (cada bloque es un código block para mantener formato)
+    systems = iter_chord_chart(*chart_args)
+    while True:
+        block = list(islice(systems, CHART_DISPLAY_BLOCK_SYSTEMS))
+        if not block:
+            break
+        st.code('\n\n'.join(block), language=None)
     
     # Botón para generar PDF
     st.markdown("### 📄 Exportar a PDF")
     
     col1, col2 = st.columns([1, 2])
     
+    pdf_title = f"Chart de Acordes - {file_source}"
+    if transposition_label(semitones, capo):
+        pdf_title += f" ({transposition_label(semitones, capo)})"
+    pdf_args = (chart_chords, bpm, beats_per_measure, measures_per_line, pdf_title, offset, tempo_map)
+    clean_filename = file_source.replace('.csv', '').replace(' ', '_')
+    pdf_filename = f"chord_chart_{clean_filename}.pdf"
+    
     with col1:
-        # Método 1: Botón de descarga nativo de Streamlit (más confiable)
+        # El PDF se genera solo al pulsar el botón (en las versiones de Streamlit
+        # que aceptan un callable) y se descarga por HTTP, sin incrustarlo en la
+        # página; en versiones anteriores se pasan los bytes, que salen de
+        # pdf_cache a partir de la segunda ejecución
         try:
-            pdf = generate_pdf(chart_text, f"Chart de Acordes - {file_source}")
-            pdf_bytes = pdf.output(dest='S')
-            if isinstance(pdf_bytes, str):
-                pdf_bytes = pdf_bytes.encode('latin-1', errors='replace')
-            
-            clean_filename = file_source.replace('.csv', '').replace(' ', '_')
-            pdf_filename = f"chord_chart_{clean_filename}.pdf"
-            
             st.download_button(
                 label="📄 Descargar PDF",
-                data=pdf_bytes,
+                data=(lambda: chart_pdf_bytes(*pdf_args)) if DOWNLOAD_ACCEPTS_CALLABLE else chart_pdf_bytes(*pdf_args),
                 file_name=pdf_filename,
                 mime="application/pdf",
                 type="primary"
             )
-            
         except Exception as e:
             st.error(f"Error al preparar PDF: {e}")
     
     with col2:
-        # Método alternativo usando enlace HTML
-        if st.button("🔗 Generar enlace de descarga", type="secondary"):
+        pdf_stats = pdf_cache.stats()
+        st.caption(
+            f"PDFs en caché: {pdf_stats['entries']} ({pdf_stats['bytes'] / 1024:.0f} KB, "
+            f"{pdf_stats['hits']} aciertos)"
+        )
+    
+    # Pista de acompañamiento de la canción completa
+    st.markdown("### 🎧 Pista de acompañamiento")
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        backing_instrument = st.selectbox("Instrumento:", ["piano", "sine", "organ"], key="backing_instrument")
+        crossfade = st.checkbox("Fundir transiciones entre acordes", value=True)
+    
+    with col2:
+        if st.button("🎧 Generar pista de acompañamiento", type="secondary"):
+            backing_mode = "overlap" if crossfade else "cut"
+            timeline = ChordTimeline.coerce(sounding_chords)
+            # Un WAV temporal propio por render, que se borra al terminar: una
+            # pista de una canción larga ocupa cientos de MB y cada instrumento,
+            # modo o transposición daría otro archivo. Streamlit guarda sus bytes
+            # en memoria al mostrarlo (show_wav)
+            fd, backing_path = tempfile.mkstemp(prefix="backing_", suffix=".wav")
             try:
-                pdf = generate_pdf(chart_text, f"Chart de Acordes - {file_source}")
+                progress_bar = st.progress(0.0, text="Renderizando pista...")
+                with os.fdopen(fd, 'wb') as backing_file:
+                    render_backing_track(
+                        timeline, backing_file, backing_instrument, mode=backing_mode,
+                        progress=lambda done, total: progress_bar.progress(
+                            done / total, text=f"Acorde {done}/{total}"
+                        )
+                    )
                 clean_filename = file_source.replace('.csv', '').replace(' ', '_')
-                pdf_filename = f"chord_chart_{clean_filename}.pdf"
-                pdf_link = get_pdf_download_link(pdf, pdf_filename)
-                st.markdown(pdf_link, unsafe_allow_html=True)
-                st.success("Enlace de descarga generado!")
+                show_wav(backing_path, "💾 Descargar pista WAV", f"acompanamiento_{clean_filename}_{backing_instrument}.wav")
             except Exception as e:
-                st.error(f"Error al generar enlace: {e}")
-                st.info("Usa el botón 'Descargar PDF' de la izquierda como alternativa")
+                st.error(f"Error al generar la pista de acompañamiento: {e}")
+            finally:
+                os.remove(backing_path)
 
 if __name__ == "__main__":
     main()
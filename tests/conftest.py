@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Importar chordchart desde el árbol del repositorio (no hay paquete instalable)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+"""Regresión de memoria pico de render_scale_audio
+
+El presupuesto es el resultado int16 (2 bytes por muestra, solo si se
+devuelve en memoria), unos pocos buffers del tamaño de una nota y lo que
+quede retenido en las cachés de notas y envolventes. Un buffer float64 de
+la escala completa (8 bytes por muestra) lo supera con creces.
+"""
+import tracemalloc
+
+import pytest
+
+from chordchart import envelope_cache, note_cache
+from chordchart.audio import render_scale_audio
+
+# Escala larga: 7 notas subiendo y bajando, 10 veces, 2 s por nota
+SCALE_ARGS = ('C', 2000, 10, True, True)
+
+# Buffers de una nota (float64) que se permiten además del resultado
+NOTE_BUFFER_ALLOWANCE = 8
+
+
+def measure_peak(instrument, out_path=None):
+    """(audio, sample rate, pico en bytes, bytes retenidos en cachés)"""
+    note_cache.clear()
+    envelope_cache.clear()
+    # Calentar cachés de módulo (wavetables) fuera de la medición
+    render_scale_audio('C', 200, 1, True, False, instrument)
+
+    tracemalloc.start()
+    try:
+        audio, sample_rate = render_scale_audio(*SCALE_ARGS, instrument, out_path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return audio, sample_rate, peak, note_cache.current_bytes + envelope_cache.current_bytes
+
+
+def note_allowance(sample_rate):
+    return NOTE_BUFFER_ALLOWANCE * int(sample_rate * SCALE_ARGS[1] / 1000.0) * 8
+
+
+@pytest.mark.parametrize('instrument', ['piano', 'sine', 'organ'])
+def test_scale_peak_memory_in_memory(instrument):
+    audio, sample_rate, peak, cached = measure_peak(instrument)
+
+    assert audio.dtype.itemsize == 2
+    assert peak <= len(audio) * 2 + note_allowance(sample_rate) + cached
+
+
+@pytest.mark.parametrize('instrument', ['piano', 'sine', 'organ'])
+def test_scale_peak_memory_to_disk(tmp_path, instrument):
+    audio, sample_rate, peak, cached = measure_peak(instrument, str(tmp_path / 'escala.wav'))
+
+    # El PCM va al WAV mapeado: en memoria solo quedan buffers de notas
+    assert len(audio) > 0
+    assert peak <= note_allowance(sample_rate) + cached